@@ -0,0 +1,170 @@
+"""
+Pure task-text rules for the browser agent.
+
+These helpers take task strings (or an exception) and return strings/bools with
+no I/O, so they can be compiled ahead of time (e.g. with mypyc) without
+touching the async BrowserAgent. BrowserAgent re-exports each one under its
+historical underscore name.
+"""
+
+from __future__ import annotations
+
+import re
+
+_URL_RE = re.compile(r"https?://[^\s]+")
+_DOMAIN_RE = re.compile(r"\b([a-zA-Z0-9-]+\.(?:com|org|edu|gov|net|io|ai|co))\b")
+_LOCALHOST_RE = re.compile(
+    r"\b(localhost|127\.0\.0\.1)(?:\s*:\s*|\s+)?(\d{2,5})?([/\w\-.?=&%+]*)",
+    re.IGNORECASE,
+)
+_NAVIGATION_VERB_RE = re.compile(r"\b(go to|open|visit)\b", re.IGNORECASE)
+
+_KEEP_OPEN_MARKERS = ("stay open", "keep open", "leave open", "do not close", "don't close")
+_CLOSE_MARKERS = (
+    "close the browser",
+    "close browser",
+    "close the window",
+    "close window",
+    "close the tab",
+    "close tab",
+    "quit browser",
+    "exit browser",
+)
+_PLAYWRIGHT_FALLBACK_MARKERS = (
+    "failed to import",
+    "no module named",
+    "cannot import name",
+    "unsupported operand type(s) for |",
+)
+_NEW_TAB_MARKERS = (
+    "open a new browser tab",
+    "open new browser tab",
+    "open a new tab",
+    "open new tab",
+    "new tab",
+)
+_CURRENT_TAB_MARKERS = (
+    "currently open",
+    "current tab",
+    "already open",
+    "on the page",
+    "on this page",
+    "that is open",
+)
+# Product-specific heuristics to avoid incorrect search fallbacks.
+_STICKY_SITE_MARKERS = ("scopegrade",)
+
+
+def should_close_after_task(task: str) -> bool:
+    lowered = task.lower()
+    if any(marker in lowered for marker in _KEEP_OPEN_MARKERS):
+        return False
+    return any(marker in lowered for marker in _CLOSE_MARKERS)
+
+
+def should_fallback_to_playwright(exc: Exception) -> bool:
+    if isinstance(exc, (ImportError, ModuleNotFoundError)):
+        return True
+    lowered = str(exc).lower()
+    return any(marker in lowered for marker in _PLAYWRIGHT_FALLBACK_MARKERS)
+
+
+def extract_direct_url(task: str) -> str | None:
+    task = task.strip()
+    if not task:
+        return None
+
+    url_match = _URL_RE.search(task)
+    if url_match:
+        return url_match.group(0).rstrip(".,);")
+
+    domain_match = _DOMAIN_RE.search(task)
+    if domain_match:
+        return f"https://{domain_match.group(1)}"
+
+    localhost_match = _LOCALHOST_RE.search(task)
+    if localhost_match:
+        host = localhost_match.group(1)
+        port = localhost_match.group(2)
+        path = (localhost_match.group(3) or "").strip()
+        path = path.rstrip(".,);")
+        normalized = f"http://{host}"
+        if port:
+            normalized += f":{port}"
+        if path:
+            if not path.startswith("/"):
+                path = f"/{path}"
+            normalized += path
+        return normalized
+
+    return None
+
+
+def is_open_new_tab_task(task: str) -> bool:
+    lowered = task.lower()
+    return any(marker in lowered for marker in _NEW_TAB_MARKERS)
+
+
+def is_current_tab_context_task(task: str) -> bool:
+    lowered = task.lower()
+    return any(marker in lowered for marker in _CURRENT_TAB_MARKERS)
+
+
+def should_reuse_existing_page(task: str) -> bool:
+    lowered = task.lower()
+    if is_current_tab_context_task(task):
+        return True
+    return any(marker in lowered for marker in _STICKY_SITE_MARKERS)
+
+
+def steer_task_for_existing_page(task: str) -> str:
+    """
+    If the user indicates the target page is already open, prepend strict
+    instructions to avoid search/navigation drift.
+    """
+    lowered = task.lower()
+    wants_localhost = ("localhost" in lowered) or ("127.0.0.1" in lowered) or ("scopegrade" in lowered)
+
+    if not should_reuse_existing_page(task) and not wants_localhost:
+        return task
+
+    if wants_localhost:
+        steering = (
+            "HARD CONSTRAINT (LOCAL-SITE MODE):\n"
+            "- You MUST use the currently open local-server page/tab in this browser session.\n"
+            "- Do NOT perform web search.\n"
+            "- Do NOT type the full task sentence into the browser address/search bar.\n"
+            "- Do NOT navigate to unrelated public websites.\n"
+            "- If a navigation is required, only use local-server URLs (e.g. http://127.0.0.1:PORT).\n"
+            "- Prioritize interacting with the existing on-page UI to complete the task.\n\n"
+            "Task:\n"
+        )
+        return f"{steering}{task}"
+
+    steering = (
+        "IMPORTANT EXECUTION CONSTRAINTS:\n"
+        "- The target page is already open in the current browser session.\n"
+        "- Stay on the currently open relevant tab/page.\n"
+        "- Do NOT perform web search and do NOT navigate to unrelated sites.\n"
+        "- Do NOT type the full task sentence into the browser address/search bar.\n"
+        "- Only navigate if the task explicitly gives a direct URL.\n"
+        "- Prioritize interacting with existing on-page UI to complete the task.\n\n"
+        "Task:\n"
+    )
+    return f"{steering}{task}"
+
+
+def must_avoid_search(task: str) -> bool:
+    lowered = task.lower()
+    if should_reuse_existing_page(task):
+        return True
+    return ("localhost" in lowered) or ("127.0.0.1" in lowered) or ("scopegrade" in lowered)
+
+
+def task_to_search_query(task: str) -> str:
+    cleaned = " ".join(task.split())
+    if not cleaned:
+        return "official website"
+    if _NAVIGATION_VERB_RE.search(cleaned):
+        return cleaned
+    return f"{cleaned} official website"
@@ -8,6 +8,7 @@ from __future__ import annotations
 
 import asyncio
 import atexit
+import json
 import os
 import sys
 import tempfile
@@ -17,8 +18,17 @@ from pathlib import Path
 from urllib.parse import quote_plus
 from typing import Any, Optional
 
+from agents.browser import _text_rules
+
 _RETAINED_BROWSER_HANDLES: list[dict[str, Any]] = []
 
+# Cookies/localStorage carried across Playwright sessions so logins survive restarts.
+_STORAGE_STATE_PATH = Path.home() / ".clovis" / "browser_state.json"
+
+# Patterns used to pull local file paths out of task text.
+_QUOTED_RE = re.compile(r"""['"]([^'"]+)['"]""")
+_PATH_RE = re.compile(r"""(?<!\w)(~\/[^\s,;]+|\/[^\s,;]+)""")
+
 
 def _ensure_browser_use_on_path() -> None:
     repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -159,7 +169,14 @@ class BrowserAgent:
 
         playwright = await async_playwright().start()
         browser, used_headless = await self._launch_playwright_browser(playwright, launch_env)
-        context = await browser.new_context()
+        storage_state = str(_STORAGE_STATE_PATH) if _STORAGE_STATE_PATH.exists() else None
+        try:
+            context = await browser.new_context(storage_state=storage_state)
+        except Exception as exc:
+            if storage_state is None:
+                raise
+            print(f"[Browser Agent] Ignoring unreadable storage state {storage_state}: {exc}")
+            context = await browser.new_context()
         page = await context.new_page()
 
         cls._shared_backend = "playwright"
@@ -172,6 +189,33 @@ class BrowserAgent:
         print("[Browser Agent] Created persistent Playwright session.")
         return page, used_headless
 
+    @staticmethod
+    async def _save_playwright_storage_state(context) -> None:
+        if context is None:
+            return
+        tmp_path = None
+        try:
+            state = await context.storage_state()
+            # Session cookies live here; they are never on disk with wider permissions
+            # than 0600, even briefly. mkstemp creates the file owner-only.
+            _STORAGE_STATE_PATH.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=_STORAGE_STATE_PATH.parent,
+                prefix=f".{_STORAGE_STATE_PATH.name}.",
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(state, handle)
+            os.replace(tmp_path, _STORAGE_STATE_PATH)
+            tmp_path = None
+        except Exception as exc:
+            print(f"[Browser Agent] Could not save storage state: {exc}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
     async def execute(self, task: str) -> dict[str, Any]:
         # Extract the direct URL from the ORIGINAL task before steering is applied,
         # so the steering preamble text doesn't produce false URL matches.
@@ -319,6 +363,8 @@ class BrowserAgent:
             action_mode=action_mode,
         )
 
+        await self._save_playwright_storage_state(type(self)._shared_playwright_context)
+
         if close_when_done:
             await type(self)._close_shared_resources()
         else:
@@ -410,79 +456,16 @@ class BrowserAgent:
         ]
         return [path for path in candidates if Path(path).exists()]
 
-    @staticmethod
-    def _should_close_after_task(task: str) -> bool:
-        lowered = task.lower()
-
-        keep_open_markers = [
-            "stay open",
-            "keep open",
-            "leave open",
-            "do not close",
-            "don't close",
-        ]
-        if any(marker in lowered for marker in keep_open_markers):
-            return False
-
-        close_markers = [
-            "close the browser",
-            "close browser",
-            "close the window",
-            "close window",
-            "close the tab",
-            "close tab",
-            "quit browser",
-            "exit browser",
-        ]
-        return any(marker in lowered for marker in close_markers)
-
-    @staticmethod
-    def _should_fallback_to_playwright(exc: Exception) -> bool:
-        if isinstance(exc, (ImportError, ModuleNotFoundError)):
-            return True
-        lowered = str(exc).lower()
-        markers = [
-            "failed to import",
-            "no module named",
-            "cannot import name",
-            "unsupported operand type(s) for |",
-        ]
-        return any(marker in lowered for marker in markers)
-
-    @staticmethod
-    def _extract_direct_url(task: str) -> str | None:
-        task = task.strip()
-        if not task:
-            return None
-
-        url_match = re.search(r"https?://[^\s]+", task)
-        if url_match:
-            return url_match.group(0).rstrip(".,);")
-
-        domain_match = re.search(r"\b([a-zA-Z0-9-]+\.(?:com|org|edu|gov|net|io|ai|co))\b", task)
-        if domain_match:
-            return f"https://{domain_match.group(1)}"
-
-        localhost_match = re.search(
-            r"\b(localhost|127\.0\.0\.1)(?:\s*:\s*|\s+)?(\d{2,5})?([/\w\-.?=&%+]*)",
-            task,
-            flags=re.IGNORECASE,
-        )
-        if localhost_match:
-            host = localhost_match.group(1)
-            port = localhost_match.group(2)
-            path = (localhost_match.group(3) or "").strip()
-            path = path.rstrip(".,);")
-            normalized = f"http://{host}"
-            if port:
-                normalized += f":{port}"
-            if path:
-                if not path.startswith("/"):
-                    path = f"/{path}"
-                normalized += path
-            return normalized
-
-        return None
+    # Pure string rules live in _text_rules so they can be compiled separately.
+    _should_close_after_task = staticmethod(_text_rules.should_close_after_task)
+    _should_fallback_to_playwright = staticmethod(_text_rules.should_fallback_to_playwright)
+    _extract_direct_url = staticmethod(_text_rules.extract_direct_url)
+    _is_open_new_tab_task = staticmethod(_text_rules.is_open_new_tab_task)
+    _is_current_tab_context_task = staticmethod(_text_rules.is_current_tab_context_task)
+    _should_reuse_existing_page = staticmethod(_text_rules.should_reuse_existing_page)
+    _steer_task_for_existing_page = staticmethod(_text_rules.steer_task_for_existing_page)
+    _must_avoid_search = staticmethod(_text_rules.must_avoid_search)
+    _task_to_search_query = staticmethod(_text_rules.task_to_search_query)
 
     @staticmethod
     def _extract_available_file_paths_from_task(task: str) -> list[str]:
@@ -493,13 +476,13 @@ class BrowserAgent:
         candidates: list[str] = []
 
         # Quoted chunks commonly contain explicit file paths.
-        for quoted in re.findall(r"""['"]([^'"]+)['"]""", task):
+        for quoted in _QUOTED_RE.findall(task):
             q = quoted.strip()
             if q:
                 candidates.append(q)
 
         # Also capture unquoted absolute/home-relative paths.
-        for match in re.findall(r"""(?<!\w)(~\/[^\s,;]+|\/[^\s,;]+)""", task):
+        for match in _PATH_RE.findall(task):
             m = str(match).strip()
             if m:
                 candidates.append(m)
@@ -536,86 +519,6 @@ class BrowserAgent:
 
         return resolved
 
-    @staticmethod
-    def _is_open_new_tab_task(task: str) -> bool:
-        lowered = task.lower()
-        markers = [
-            "open a new browser tab",
-            "open new browser tab",
-            "open a new tab",
-            "open new tab",
-            "new tab",
-        ]
-        return any(marker in lowered for marker in markers)
-
-    @staticmethod
-    def _is_current_tab_context_task(task: str) -> bool:
-        lowered = task.lower()
-        markers = [
-            "currently open",
-            "current tab",
-            "already open",
-            "on the page",
-            "on this page",
-            "that is open",
-        ]
-        return any(marker in lowered for marker in markers)
-
-    @classmethod
-    def _should_reuse_existing_page(cls, task: str) -> bool:
-        lowered = task.lower()
-        if cls._is_current_tab_context_task(task):
-            return True
-        # Product-specific heuristics to avoid incorrect search fallbacks.
-        sticky_site_markers = [
-            "scopegrade",
-        ]
-        return any(marker in lowered for marker in sticky_site_markers)
-
-    @classmethod
-    def _steer_task_for_existing_page(cls, task: str) -> str:
-        """
-        If the user indicates the target page is already open, prepend strict
-        instructions to avoid search/navigation drift.
-        """
-        lowered = task.lower()
-        wants_localhost = ("localhost" in lowered) or ("127.0.0.1" in lowered) or ("scopegrade" in lowered)
-
-        if not cls._should_reuse_existing_page(task) and not wants_localhost:
-            return task
-
-        if wants_localhost:
-            steering = (
-                "HARD CONSTRAINT (LOCAL-SITE MODE):\n"
-                "- You MUST use the currently open local-server page/tab in this browser session.\n"
-                "- Do NOT perform web search.\n"
-                "- Do NOT type the full task sentence into the browser address/search bar.\n"
-                "- Do NOT navigate to unrelated public websites.\n"
-                "- If a navigation is required, only use local-server URLs (e.g. http://127.0.0.1:PORT).\n"
-                "- Prioritize interacting with the existing on-page UI to complete the task.\n\n"
-                "Task:\n"
-            )
-            return f"{steering}{task}"
-
-        steering = (
-            "IMPORTANT EXECUTION CONSTRAINTS:\n"
-            "- The target page is already open in the current browser session.\n"
-            "- Stay on the currently open relevant tab/page.\n"
-            "- Do NOT perform web search and do NOT navigate to unrelated sites.\n"
-            "- Do NOT type the full task sentence into the browser address/search bar.\n"
-            "- Only navigate if the task explicitly gives a direct URL.\n"
-            "- Prioritize interacting with existing on-page UI to complete the task.\n\n"
-            "Task:\n"
-        )
-        return f"{steering}{task}"
-
-    @classmethod
-    def _must_avoid_search(cls, task: str) -> bool:
-        lowered = task.lower()
-        if cls._should_reuse_existing_page(task):
-            return True
-        return ("localhost" in lowered) or ("127.0.0.1" in lowered) or ("scopegrade" in lowered)
-
     async def _select_relevant_existing_page(self, task: str, default_page):
         """Return a matching open page, or None if no relevant page is found."""
         lowered = task.lower()
@@ -646,15 +549,6 @@ class BrowserAgent:
 
         return None
 
-    @staticmethod
-    def _task_to_search_query(task: str) -> str:
-        cleaned = " ".join(task.split())
-        if not cleaned:
-            return "official website"
-        if re.search(r"\b(go to|open|visit)\b", cleaned, flags=re.IGNORECASE):
-            return cleaned
-        return f"{cleaned} official website"
-
     @staticmethod
     def _build_fallback_summary(
         task: str,
@@ -49,6 +49,13 @@ _TEXT_LAYOUT_STEP_PX = 28
 _TEXT_LAYOUT_MAX_RINGS = 10
 _TEXT_OVERLAP_BUFFER_PX = 0
 
+# Handlers that do not depend on each other's results -> index of the element id
+# in their queued args. Consecutive queued actions sharing a timestamp run
+# concurrently when all of them are listed here and touch different ids, so a
+# draw and a destroy of the same element keep their queue order.
+# Text creation stays serial because its layout depends on previously placed text.
+_INDEPENDENT_ACTIONS = {_draw_bounding_box: 4, _draw_dot: 2, _destroy_box: 0}
+
 
 def _get_sizes():
     global _SCREEN_SIZE, _VIEWPORT_SIZE
@@ -129,6 +136,12 @@ def _ensure_queue_processor():
         pass
 
 
+def _action_element_id(func, args):
+    """Element id an independent action works on; None when one will be generated."""
+    index = _INDEPENDENT_ACTIONS[func]
+    return args[index] if len(args) > index else None
+
+
 async def _run_queue_async():
     """Process queued actions with their time delays."""
     global _LAST_DIRECT_RESPONSE, _WAITED_AFTER_DIRECT_RESPONSE
@@ -141,6 +154,20 @@ async def _run_queue_async():
             continue
 
         time_s, func, args, kwargs = ACTION_QUEUE.popleft()
+        batch = [(func, args, kwargs)]
+        if func in _INDEPENDENT_ACTIONS:
+            batch_ids = {_action_element_id(func, args)}
+            while (
+                ACTION_QUEUE
+                and float(ACTION_QUEUE[0][0]) == float(time_s)
+                and ACTION_QUEUE[0][1] in _INDEPENDENT_ACTIONS
+            ):
+                next_id = _action_element_id(ACTION_QUEUE[0][1], ACTION_QUEUE[0][2])
+                if next_id is not None and next_id in batch_ids:
+                    break
+                _, next_func, next_args, next_kwargs = ACTION_QUEUE.popleft()
+                batch.append((next_func, next_args, next_kwargs))
+                batch_ids.add(next_id)
 
         # Handle direct_response delay
         if _LAST_DIRECT_RESPONSE and not _WAITED_AFTER_DIRECT_RESPONSE:
@@ -153,7 +180,10 @@ async def _run_queue_async():
         delay = max(0.0, float(time_s) - last_time)
         if delay:
             await asyncio.sleep(delay)
-        await func(*args, **kwargs)
+        if len(batch) == 1:
+            await func(*args, **kwargs)
+        else:
+            await asyncio.gather(*(f(*a, **kw) for f, a, kw in batch))
         last_time = float(time_s)
 
 
@@ -32,6 +32,82 @@ class CLIResponse:
     tool_calls: Optional[List[Dict]] = None
 
 
+# Server launch commands (matched against lowercased command text).
+_SERVER_COMMAND_RE = re.compile(
+    "|".join((
+        r"\bnpm\s+run\s+(dev|start|serve)\b",
+        r"\bnpm\s+(start|serve)\b",
+        r"\bpnpm\s+(dev|start|serve)\b",
+        r"\byarn\s+(dev|start|serve)\b",
+        r"\bnext\s+dev\b",
+        r"\bvite\b",
+        r"\bwebpack-dev-server\b",
+        r"\buvicorn\b",
+        r"\bflask\s+run\b",
+        r"\bpython(?:3)?\s+-m\s+http\.server\b",
+        r"\bnode\s+.+\b(server|dev)\b",
+        r"\bgunicorn\b",
+    ))
+)
+
+_BACKGROUND_INTENT_MARKERS = (
+    "localhost",
+    "port ",
+    "dev server",
+    "web server",
+    "api server",
+    "keep running",
+    "background",
+    "until i stop",
+)
+_SERVER_INTENT_MARKERS = (
+    "localhost",
+    "127.0.0.1",
+    "local server",
+    "dev server",
+    "web server",
+    "api server",
+    "npm start",
+    "npm run dev",
+    "pnpm dev",
+    "yarn dev",
+    "uvicorn",
+    "flask run",
+)
+_SETUP_MARKERS = (
+    "clone",
+    "git ",
+    "install",
+    "dependency",
+    "dependencies",
+    "setup",
+    "set up",
+    "bootstrap",
+    "scaffold",
+    "build",
+    "compile",
+    "create",
+    "download",
+    "npm ci",
+    "pip install",
+    "pnpm install",
+    "yarn install",
+)
+
+
+def _marker_pattern(markers: tuple[str, ...]) -> re.Pattern:
+    """Compile plain substring markers into one alternation scanned in a single pass."""
+    return re.compile("|".join(re.escape(marker) for marker in markers))
+
+
+_BACKGROUND_INTENT_RE = _marker_pattern(_BACKGROUND_INTENT_MARKERS)
+_SERVER_INTENT_RE = _marker_pattern(_SERVER_INTENT_MARKERS)
+_SETUP_RE = _marker_pattern(_SETUP_MARKERS)
+
+_CD_CHAIN_RE = re.compile(r"^\s*cd\s+([^;&|]+?)\s*&&\s*(.+)$", flags=re.IGNORECASE | re.DOTALL)
+_CD_ONLY_RE = re.compile(r"^\s*cd\s+(.+?)\s*$", flags=re.IGNORECASE | re.DOTALL)
+
+
 def _clean_join_text(*parts: Any) -> str:
     cleaned_parts: List[str] = []
     for part in parts:
@@ -235,58 +311,19 @@ class CLIAgent:
 
     @staticmethod
     def _is_server_like_command(command: str) -> bool:
-        c = command.lower()
-        patterns = [
-            r"\bnpm\s+run\s+(dev|start|serve)\b",
-            r"\bnpm\s+(start|serve)\b",
-            r"\bpnpm\s+(dev|start|serve)\b",
-            r"\byarn\s+(dev|start|serve)\b",
-            r"\bnext\s+dev\b",
-            r"\bvite\b",
-            r"\bwebpack-dev-server\b",
-            r"\buvicorn\b",
-            r"\bflask\s+run\b",
-            r"\bpython(?:3)?\s+-m\s+http\.server\b",
-            r"\bnode\s+.+\b(server|dev)\b",
-            r"\bgunicorn\b",
-        ]
-        return any(re.search(p, c) for p in patterns)
+        return _SERVER_COMMAND_RE.search(command.lower()) is not None
 
     @classmethod
     def _is_background_intent_task(cls, task: str, command: str) -> bool:
         text = (task or "").lower()
-        intent_markers = [
-            "localhost",
-            "port ",
-            "dev server",
-            "web server",
-            "api server",
-            "keep running",
-            "background",
-            "until i stop",
-        ]
-        return cls._is_server_like_command(command) or any(marker in text for marker in intent_markers)
+        return cls._is_server_like_command(command) or _BACKGROUND_INTENT_RE.search(text) is not None
 
     @classmethod
     def _is_server_intent_text(cls, text: str) -> bool:
         lowered = (text or "").lower()
         if not lowered:
             return False
-        markers = [
-            "localhost",
-            "127.0.0.1",
-            "local server",
-            "dev server",
-            "web server",
-            "api server",
-            "npm start",
-            "npm run dev",
-            "pnpm dev",
-            "yarn dev",
-            "uvicorn",
-            "flask run",
-        ]
-        if any(marker in lowered for marker in markers):
+        if _SERVER_INTENT_RE.search(lowered):
             return True
         return cls._is_server_like_command(lowered)
 
@@ -300,26 +337,7 @@ class CLIAgent:
         if not lowered:
             return False
 
-        setup_markers = [
-            "clone",
-            "git ",
-            "install",
-            "dependency",
-            "dependencies",
-            "setup",
-            "set up",
-            "bootstrap",
-            "scaffold",
-            "build",
-            "compile",
-            "create",
-            "download",
-            "npm ci",
-            "pip install",
-            "pnpm install",
-            "yarn install",
-        ]
-        if any(marker in lowered for marker in setup_markers):
+        if _SETUP_RE.search(lowered):
             return False
 
         return cls._is_server_intent_text(lowered)
@@ -388,7 +406,7 @@ class CLIAgent:
             if not command:
                 continue
 
-            cd_chain = re.match(r"^\s*cd\s+([^;&|]+?)\s*&&\s*(.+)$", command, flags=re.IGNORECASE | re.DOTALL)
+            cd_chain = _CD_CHAIN_RE.match(command)
             if cd_chain:
                 cd_target = cd_chain.group(1).strip()
                 remaining = cd_chain.group(2).strip()
@@ -403,7 +421,7 @@ class CLIAgent:
                     }
                 continue
 
-            cd_only = re.match(r"^\s*cd\s+(.+?)\s*$", command, flags=re.IGNORECASE | re.DOTALL)
+            cd_only = _CD_ONLY_RE.match(command)
             if cd_only:
                 try:
                     current_dir = cls._resolve_shell_path(cd_only.group(1), current_dir)
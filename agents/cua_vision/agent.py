@@ -5,7 +5,6 @@ This agent can see the user's screen and interact with it by clicking elements,
 typing, and using keyboard shortcuts. It uses a vision model to understand
 what's on screen and decide what actions to take.
 """
-import os
 import time
 
 from dotenv import load_dotenv
@@ -49,6 +48,38 @@ def _minimal_thinking_config():
         return types.ThinkingConfig(thinking_budget=0)
 
 
+# Configuration for screen interaction (low temperature for consistency)
+_INTERACTION_CONFIG = types.GenerateContentConfig(
+    temperature=0.2,
+    top_p=0.95,
+    top_k=64,
+    max_output_tokens=100,
+    thinking_config=_minimal_thinking_config(),
+    tools=VISION_TOOLS,
+    tool_config=TOOL_CONFIG,
+)
+
+# Configuration for screen analysis (higher temperature for flexibility)
+_ANALYSIS_CONFIG = types.GenerateContentConfig(
+    temperature=1.0,
+    top_p=0.95,
+    top_k=64,
+    max_output_tokens=3000,
+    thinking_config=_minimal_thinking_config(),
+    tools=VISION_TOOLS,
+    tool_config=TOOL_CONFIG,
+)
+
+# Configuration for continuous screen watching (free-form descriptions, no tools)
+_WATCH_CONFIG = types.GenerateContentConfig(
+    temperature=1,
+    top_p=0.95,
+    top_k=64,
+    max_output_tokens=5000,
+    thinking_config=_minimal_thinking_config(),
+)
+
+
 class VisionAgent:
     """
     Desktop control agent using screen understanding + mouse/keyboard.
@@ -63,32 +94,17 @@ class VisionAgent:
     """
 
     def __init__(self, model_name: str = "gemini-2.0-flash"):
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        # Imported here: models.models imports this module at load time.
+        from models.models import _get_genai_client
+
+        self.client = _get_genai_client()
         self.model_name = model_name
         self.max_retries = 3
         self.retries = 0
 
-        # Configuration for screen interaction (low temperature for consistency)
-        self.interaction_config = types.GenerateContentConfig(
-            temperature=0.2,
-            top_p=0.95,
-            top_k=64,
-            max_output_tokens=100,
-            thinking_config=_minimal_thinking_config(),
-            tools=VISION_TOOLS,
-            tool_config=TOOL_CONFIG,
-        )
-
-        # Configuration for screen analysis (higher temperature for flexibility)
-        self.analysis_config = types.GenerateContentConfig(
-            temperature=1.0,
-            top_p=0.95,
-            top_k=64,
-            max_output_tokens=3000,
-            thinking_config=_minimal_thinking_config(),
-            tools=VISION_TOOLS,
-            tool_config=TOOL_CONFIG,
-        )
+        # Configs are built once at import and shared across instances.
+        self.interaction_config = _INTERACTION_CONFIG
+        self.analysis_config = _ANALYSIS_CONFIG
 
         # Chat history for multi-turn interaction
         self.chat_history = []
@@ -207,13 +223,7 @@ class VisionAgent:
         reset_image_state()
         active_window = get_active_window_title()
 
-        config = types.GenerateContentConfig(
-            temperature=1,
-            top_p=0.95,
-            top_k=64,
-            max_output_tokens=5000,
-            thinking_config=_minimal_thinking_config(),
-        )
+        config = _WATCH_CONFIG
 
         while get_active_window_title() == active_window:
             time.sleep(0.2)
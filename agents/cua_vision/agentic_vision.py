@@ -7,7 +7,6 @@ This module implements a crop-and-search flow:
 3) Map localized coordinates back to full-screen space and click
 """
 
-import os
 import re
 
 try:
@@ -85,6 +84,15 @@ def _minimal_thinking_config():
         return types.ThinkingConfig(thinking_budget=0)
 
 
+_LOCATOR_CONFIG = types.GenerateContentConfig(
+    temperature=0.1,
+    top_p=0.95,
+    top_k=64,
+    max_output_tokens=64,
+    thinking_config=_minimal_thinking_config(),
+)
+
+
 def _apply_padding(
     left: float,
     top: float,
@@ -266,17 +274,14 @@ Rules:
 """
 
     _check_stop(should_stop)
-    client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+    # Imported here: models.models pulls in the vision agent at load time.
+    from models.models import _get_genai_client
+
+    client = _get_genai_client()
     response = client.models.generate_content(
         model=model_name or DEFAULT_LOCATOR_MODEL,
         contents=[cropped, prompt],
-        config=types.GenerateContentConfig(
-            temperature=0.1,
-            top_p=0.95,
-            top_k=64,
-            max_output_tokens=64,
-            thinking_config=_minimal_thinking_config(),
-        ),
+        config=_LOCATOR_CONFIG,
     )
 
     _check_stop(should_stop)
@@ -8,6 +8,7 @@ action and user-visible status text in one response.
 import asyncio
 import json
 import os
+from collections.abc import Iterable
 
 from google.api_core.exceptions import InternalServerError
 
@@ -553,6 +554,20 @@ IMPORTANT:
         self._repeated_click_cycle_count = 0
         return False
 
+    def _register_actions_and_detect_click_loop(
+        self,
+        task: str,
+        entries: Iterable[tuple[str, tuple, str | None]],
+    ) -> bool:
+        """
+        Register a run of (name, signature, click_type) actions in order.
+        Stops at, and reports, the first action that trips the loop guard.
+        """
+        return any(
+            self._register_action_and_detect_click_loop(task, name, signature, click_type)
+            for name, signature, click_type in entries
+        )
+
     async def _attempt_fallback(self, task: str, click_type: str | None, args: dict | None) -> bool:
         self._raise_if_stopped()
         context = None
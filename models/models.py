@@ -6,11 +6,20 @@ This module handles:
 - Two-tier model routing (rapid response → specialized agents)
 - Gemini API configuration
 """
+import ast
 import asyncio
+import contextvars
+import copy
+import functools
+import hashlib
+import io
 import json
+import math
 import os
-from collections import deque
-from typing import Any, Optional
+import re
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Any, Optional, Union
 
 from PIL import Image, ImageGrab
 from dotenv import load_dotenv
@@ -19,7 +28,7 @@ from models.function_calls import (
     ROUTER_TOOLS, ROUTER_TOOL_MAP,
     TOOL_CONFIG,
 )
-from models.prompts import RAPID_RESPONSE_SYSTEM_PROMPT
+from models.prompts import RAPID_RESPONSE_SYSTEM_PROMPT, _get_personality_section
 
 # Import CLOVIS agent components
 from agents.clovis.tools import CLOVIS_TOOLS, CLOVIS_TOOL_MAP, set_model_name
@@ -43,6 +52,13 @@ try:
 except ImportError:
     print('Google Gemini dependencies have not been installed')
 
+# orjson is an optional speedup for parsing model JSON; fall back to stdlib.
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 load_dotenv()
 
 
@@ -54,6 +70,61 @@ _stored_screenshot = None
 _RAPID_CONVERSATION_HISTORY = deque(maxlen=32)
 _MAX_ROUTER_CHAIN_STEPS = 6
 _REPEATED_STEP_LIMIT = 3
+# Upper bounds on Gemini calls so a stalled connection fails instead of hanging the agent.
+_ROUTER_TIMEOUT_S = 8.0
+_SCREEN_CONTEXT_TIMEOUT_S = 20.0
+_CLOVIS_STREAM_IDLE_TIMEOUT_S = 20.0
+_CLOVIS_PREVIEW_CHARS = 120
+_ROUTE_CACHE: "OrderedDict[str, tuple[float, dict[str, Any]]]" = OrderedDict()
+_ROUTE_CACHE_MAX_ENTRIES = 512
+_ROUTE_CACHE_TTL_S = 300.0
+_UPLOAD_JPEG_QUALITY = 85
+_UPLOAD_MAX_EDGE = 1024
+# Screenshots already uploaded through the Files API, keyed by content digest:
+# digest -> (uploaded_at, part, file name for deletion).
+_UPLOADED_IMAGE_PARTS: "OrderedDict[str, tuple[float, Any, str]]" = OrderedDict()
+_UPLOADED_IMAGE_MAX_ENTRIES = 32
+_UPLOADED_IMAGE_TTL_S = 3600.0
+_PENDING_IMAGE_UPLOADS: dict[str, asyncio.Task] = {}
+# Digests sent inline once; a second sighting is what triggers an upload.
+_SEEN_IMAGE_DIGESTS: "OrderedDict[str, None]" = OrderedDict()
+_SEEN_IMAGE_MAX_ENTRIES = 64
+_PENDING_IMAGE_DELETES: set[asyncio.Task] = set()
+# Per-context replacements for call_gemini collaborators ("GeminiModel",
+# "run_routed_agent_step", "direct_response", "get_stored_screenshot"). Lets
+# concurrent callers such as tests swap them without patching module globals.
+CALL_GEMINI_OVERRIDES: contextvars.ContextVar[Optional[dict[str, Any]]] = contextvars.ContextVar(
+    "CALL_GEMINI_OVERRIDES",
+    default=None,
+)
+_INFLIGHT_CALLS: dict[tuple[Any, ...], asyncio.Future] = {}
+
+# Router function name -> (agent, ((result_key, arg_key), ...))
+_ROUTER_DISPATCH: dict[str, tuple[str, tuple[tuple[str, str], ...]]] = {
+    "invoke_clovis": ("clovis", (("query", "query"),)),
+    "invoke_browser": ("browser", (("task", "task"),)),
+    "invoke_cua_cli": ("cua_cli", (("task", "task"),)),
+    "invoke_cua_vision": ("cua_vision", (("task", "task"),)),
+    "request_screen_context": ("screen_context", (("task", "task"), ("focus", "focus"))),
+    "direct_response": ("direct", (("response_text", "text"),)),
+}
+_SCREEN_REFERENCE_RE = re.compile(r"\b(this|that|here|on (?:my )?screen)\b", re.IGNORECASE)
+
+# Prompts simple enough to route without a router call (see `_fast_route`).
+_FAST_GREETING_RE = re.compile(r"\s*(?:hi|hello|hey)(?: there)?[!.\s]*", re.IGNORECASE)
+# Optional "what is"/"calculate" cue, the expression, then an optional trailing "=" and "?".
+_FAST_ARITHMETIC_RE = re.compile(
+    r"\s*(?:(?P<cue>what(?:'s|\s+is)|calculate|compute)\s+)?"
+    r"(?P<expr>[\d+\-*/().\s]+?)\s*(?P<equals>=)?\s*\??\s*",
+    re.IGNORECASE,
+)
+_FAST_SCREEN_RE = re.compile(r"\b(?:on|at) (?:my|the|this) screen\b", re.IGNORECASE)
+_FAST_ARITHMETIC_OPS = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+}
 
 
 def store_screenshot():
@@ -72,6 +143,20 @@ def get_stored_screenshot():
     return screenshot
 
 
+def _take_stored_screenshot():
+    """Get and clear the stored screenshot without ever grabbing a new one."""
+    global _stored_screenshot
+    screenshot, _stored_screenshot = _stored_screenshot, None
+    return screenshot
+
+
+def _restore_stored_screenshot(screenshot) -> None:
+    """Put back a screenshot that was taken for work that ended up unused."""
+    global _stored_screenshot
+    if screenshot is not None and _stored_screenshot is None:
+        _stored_screenshot = screenshot
+
+
 def _append_rapid_history(role: str, text: str, source: str) -> None:
     cleaned = _clean_text(text, "", max_len=600)
     if not cleaned:
@@ -121,13 +206,184 @@ def _routing_task_text(routing_result: dict[str, Any]) -> str:
     )
 
 
-def _routing_signature(routing_result: dict[str, Any]) -> tuple[str, str]:
+def _routing_signature(
+    routing_result: dict[str, Any],
+    task_text: Optional[str] = None,
+) -> tuple[str, str]:
+    if task_text is None:
+        task_text = _routing_task_text(routing_result)
     return (
         str(routing_result.get("agent") or "").strip().lower(),
-        _routing_task_text(routing_result).strip().lower(),
+        task_text.strip().lower(),
     )
 
 
+def _normalize_route_prompt(prompt: str) -> str:
+    return " ".join((prompt or "").lower().split())
+
+
+def _route_context_signature(
+    chain_steps: list[dict[str, Any]],
+    latest_screen_context: Optional[dict[str, Any]],
+    history_block: str = "",
+) -> str:
+    """
+    Short description of the context a route decision depends on.
+
+    `history_block` is the conversation history shown to the router; it is folded in
+    as a digest so follow-ups like "yes" or "do it" only reuse routes from the same
+    conversation.
+    """
+    rows = [
+        "history|" + hashlib.blake2b(history_block.encode("utf-8"), digest_size=16).hexdigest()
+    ]
+    rows += [
+        f"{step.get('agent')}|{_clean_text(step.get('task'), '', max_len=120).lower()}|{bool(step.get('success'))}"
+        for step in chain_steps[-_MAX_ROUTER_CHAIN_STEPS:]
+    ]
+    if latest_screen_context:
+        rows.append(
+            "screen|"
+            + _clean_text(latest_screen_context.get("recommended_agent"), "", max_len=40).lower()
+            + "|"
+            + _clean_text(latest_screen_context.get("recommended_task"), "", max_len=120).lower()
+        )
+    return "\n".join(rows)
+
+
+def _route_cache_key(model_name: str, user_prompt: str, context_signature: str) -> str:
+    normalized = f"{model_name}\n{_normalize_route_prompt(user_prompt)}\n{context_signature}"
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _get_cached_route(key: str) -> Optional[dict[str, Any]]:
+    entry = _ROUTE_CACHE.get(key)
+    if entry is None:
+        return None
+    stored_at, routed = entry
+    if (time.monotonic() - stored_at) > _ROUTE_CACHE_TTL_S:
+        _ROUTE_CACHE.pop(key, None)
+        return None
+    _ROUTE_CACHE.move_to_end(key)
+    return copy.deepcopy(routed)
+
+
+def _store_cached_route(key: str, routed: dict[str, Any]) -> None:
+    _ROUTE_CACHE[key] = (time.monotonic(), copy.deepcopy(routed))
+    _ROUTE_CACHE.move_to_end(key)
+    while len(_ROUTE_CACHE) > _ROUTE_CACHE_MAX_ENTRIES:
+        _ROUTE_CACHE.popitem(last=False)
+
+
+def _image_digest(image: Optional[Image.Image]) -> Optional[str]:
+    # Hashes every pixel, so callers compute it once per screenshot and pass it along.
+    if image is None:
+        return None
+    return hashlib.blake2b(image.tobytes(), digest_size=8).hexdigest()
+
+
+def _prepare_image_for_upload(
+    image: Image.Image,
+    max_edge: Optional[int] = _UPLOAD_MAX_EDGE,
+) -> "types.Part":
+    """
+    Downscale a screenshot to `max_edge` on its longest side and encode it as JPEG.
+
+    Coordinates returned by the models are normalized (0-1000), so downscaling does
+    not shift annotations; it only trims upload bytes and vision prefill tokens.
+    Pass `max_edge=None` to keep native resolution.
+    """
+    width, height = image.size
+    if max_edge and max(width, height) > max_edge:
+        scale = max_edge / max(width, height)
+        target_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        image = image.resize(target_size, Image.LANCZOS, reducing_gap=2.0)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=_UPLOAD_JPEG_QUALITY)
+    return types.Part.from_bytes(data=buffer.getvalue(), mime_type="image/jpeg")
+
+
+def _get_uploaded_image_part(digest: str) -> Optional["types.Part"]:
+    entry = _UPLOADED_IMAGE_PARTS.get(digest)
+    if entry is None:
+        return None
+    uploaded_at, part, file_name = entry
+    if (time.monotonic() - uploaded_at) > _UPLOADED_IMAGE_TTL_S:
+        _UPLOADED_IMAGE_PARTS.pop(digest, None)
+        _delete_uploaded_file(file_name)
+        return None
+    _UPLOADED_IMAGE_PARTS.move_to_end(digest)
+    return part
+
+
+def _store_uploaded_image_part(digest: str, part: "types.Part", file_name: str) -> None:
+    _UPLOADED_IMAGE_PARTS[digest] = (time.monotonic(), part, file_name)
+    _UPLOADED_IMAGE_PARTS.move_to_end(digest)
+    while len(_UPLOADED_IMAGE_PARTS) > _UPLOADED_IMAGE_MAX_ENTRIES:
+        _, (_, _, evicted_name) = _UPLOADED_IMAGE_PARTS.popitem(last=False)
+        _delete_uploaded_file(evicted_name)
+
+
+def _mark_image_seen(digest: str) -> bool:
+    """Record a digest sent inline; True if it had already been seen."""
+    if digest in _SEEN_IMAGE_DIGESTS:
+        _SEEN_IMAGE_DIGESTS.move_to_end(digest)
+        return True
+    _SEEN_IMAGE_DIGESTS[digest] = None
+    while len(_SEEN_IMAGE_DIGESTS) > _SEEN_IMAGE_MAX_ENTRIES:
+        _SEEN_IMAGE_DIGESTS.popitem(last=False)
+    return False
+
+
+def _delete_uploaded_file(file_name: str) -> None:
+    """Remove an evicted upload from the project's Files API storage in the background."""
+    try:
+        task = asyncio.get_running_loop().create_task(_delete_uploaded_file_async(file_name))
+    except RuntimeError:
+        return
+    _PENDING_IMAGE_DELETES.add(task)
+    task.add_done_callback(_PENDING_IMAGE_DELETES.discard)
+
+
+async def _delete_uploaded_file_async(file_name: str) -> None:
+    try:
+        await _get_genai_client().aio.files.delete(name=file_name)
+    except Exception as exc:
+        print(f"[Gemini] Deleting uploaded screenshot {file_name} failed: {exc}")
+
+
+async def _coalesce_inflight(key: tuple[Any, ...], factory) -> Any:
+    """Share one in-flight call between concurrent callers with the same key."""
+    while (pending := _INFLIGHT_CALLS.get(key)) is not None:
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            # Only the leader was cancelled: run the call again rather than inherit that.
+            if pending.cancelled() and not asyncio.current_task().cancelling():
+                continue
+            raise
+
+    future = asyncio.get_running_loop().create_future()
+    _INFLIGHT_CALLS[key] = future
+    try:
+        result = await factory()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as exc:
+        future.set_exception(exc)
+        # Mark the exception as retrieved when no follower is waiting on it.
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _INFLIGHT_CALLS.pop(key, None)
+
+
 def _format_chain_state_for_prompt(
     user_prompt: str,
     chain_steps: list[dict[str, Any]],
@@ -194,13 +450,16 @@ def _format_chain_state_for_prompt(
     )
 
 
-def _parse_json_object_from_text(raw_text: str) -> dict[str, Any]:
+def _parse_json_object_from_text(raw_text: Union[str, dict[str, Any], None]) -> dict[str, Any]:
+    if isinstance(raw_text, dict):
+        return raw_text
+
     text = (raw_text or "").strip()
     if not text:
         return {}
 
     try:
-        parsed = json.loads(text)
+        parsed = _json_loads(text)
         if isinstance(parsed, dict):
             return parsed
     except Exception:
@@ -211,7 +470,7 @@ def _parse_json_object_from_text(raw_text: str) -> dict[str, Any]:
     if start >= 0 and end > start:
         snippet = text[start:end + 1]
         try:
-            parsed = json.loads(snippet)
+            parsed = _json_loads(snippet)
             if isinstance(parsed, dict):
                 return parsed
         except Exception:
@@ -220,6 +479,53 @@ def _parse_json_object_from_text(raw_text: str) -> dict[str, Any]:
     return {}
 
 
+def _screen_context_from_parts(response: Any) -> dict[str, Any]:
+    """Pull a JSON payload straight from response parts when `response.text` is empty."""
+    candidates = getattr(response, "candidates", None) or []
+    content = getattr(candidates[0], "content", None) if candidates else None
+    for part in getattr(content, "parts", None) or []:
+        function_call = getattr(part, "function_call", None)
+        if function_call is not None and isinstance(function_call.args, dict):
+            return function_call.args
+        parsed = _parse_json_object_from_text(getattr(part, "text", None))
+        if parsed:
+            return parsed
+    return {}
+
+
+def _build_screen_judge_prompt(user_request: str, focus: str = "") -> str:
+    focus_text = _clean_text(focus, "", max_len=200)
+    return (
+        "You are Screen Judge for a computer-use orchestrator.\n"
+        "Analyze the screenshot and extract only high-signal routing context.\n"
+        "Return JSON ONLY, no markdown.\n\n"
+        "Required JSON schema:\n"
+        "{\n"
+        '  "summary": "short factual summary",\n'
+        '  "repo_url": "github/git url if visible else empty string",\n'
+        '  "local_url": "localhost/127.0.0.1 URL if visible else empty string",\n'
+        '  "recommended_agent": "cua_cli|cua_vision|browser|clovis|direct",\n'
+        '  "recommended_task": "single concrete next step task",\n'
+        '  "hints": "short extra details useful for routing"\n'
+        "}\n\n"
+        f"User request: {user_request}\n"
+        f"Extraction focus: {focus_text if focus_text else 'general execution context'}\n"
+        "Do not invent URLs. If uncertain, leave fields empty."
+    )
+
+
+def _screen_context_from_response(response: Any, user_request: str) -> dict[str, Any]:
+    raw_text = str(getattr(response, "text", None) or "")
+    if raw_text:
+        parsed = _parse_json_object_from_text(raw_text)
+    else:
+        parsed = _parse_json_object_from_text(_screen_context_from_parts(response))
+    normalized = _normalize_screen_context_payload(parsed, user_request=user_request)
+    if not normalized.get("summary"):
+        normalized["summary"] = _clean_text(raw_text, "Screen context captured.", max_len=420)
+    return normalized
+
+
 def _normalize_screen_context_payload(
     payload: dict[str, Any],
     user_request: str,
@@ -329,6 +635,16 @@ def _finalize_direct_response_text(
 def _clean_text(value: Any, fallback: str, max_len: int = 1400) -> str:
     if value is None:
         return fallback
+    # Fast path: short single-line strings with no runs of spaces are already clean.
+    if (
+        type(value) is str
+        and len(value) <= max_len
+        and value.isprintable()
+        and "  " not in value
+        and not value.startswith(" ")
+        and not value.endswith(" ")
+    ):
+        return value or fallback
     text = " ".join(str(value).split())
     if not text:
         return fallback
@@ -565,6 +881,107 @@ async def _run_routed_agent_step(
     }
 
 
+def _looks_screen_referential(user_prompt: str) -> bool:
+    return bool(_SCREEN_REFERENCE_RE.search(user_prompt or ""))
+
+
+def _eval_arithmetic(node: ast.AST) -> Union[int, float]:
+    if isinstance(node, ast.Expression):
+        return _eval_arithmetic(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        value = _eval_arithmetic(node.operand)
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.BinOp) and type(node.op) in _FAST_ARITHMETIC_OPS:
+        return _FAST_ARITHMETIC_OPS[type(node.op)](
+            _eval_arithmetic(node.left),
+            _eval_arithmetic(node.right),
+        )
+    raise ValueError("unsupported arithmetic expression")
+
+
+def _fast_route(user_prompt: str) -> Optional[dict[str, Any]]:
+    """Route greetings, bare arithmetic and explicit screen questions without the router."""
+    prompt = user_prompt or ""
+    # A configured personality should shape even greetings, so those go through the router.
+    if not _get_personality_section() and _FAST_GREETING_RE.fullmatch(prompt):
+        return {"agent": "direct", "response_text": "Hello! What can I help you with?"}
+
+    arithmetic = _FAST_ARITHMETIC_RE.fullmatch(prompt) if len(prompt) <= 200 else None
+    expression = arithmetic["expr"].strip() if arithmetic else ""
+    # Phone numbers, year ranges and dates ("555-1234", "1990-2000", "12/25/2024")
+    # only use hyphens and slashes; without "what is"/"=" an expression needs + or *.
+    if arithmetic and not (arithmetic["cue"] or arithmetic["equals"]) and not any(op in expression for op in "+*"):
+        arithmetic = None
+    if arithmetic:
+        try:
+            tree = ast.parse(expression, mode="eval")
+            # Bare numbers are left to the router; only answer actual expressions.
+            value = _eval_arithmetic(tree) if isinstance(tree.body, ast.BinOp) else None
+        except (SyntaxError, ValueError, ArithmeticError, RecursionError):
+            value = None
+        if isinstance(value, float) and not math.isfinite(value):
+            value = None
+        if value is not None:
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            elif isinstance(value, float):
+                value = round(value, 10)
+            return {"agent": "direct", "response_text": f"{expression} = {value}"}
+
+    if _FAST_SCREEN_RE.search(prompt):
+        return {"agent": "screen_context", "task": prompt, "focus": ""}
+    return None
+
+
+def _start_speculative_screen_context(model: "GeminiModel", user_prompt: str, get_screenshot=None):
+    """
+    Start screen context extraction alongside routing for deictic prompts.
+
+    The call uses the raw prompt with no focus; `_speculation_matches` decides
+    whether the router's screen_context step can reuse it.
+
+    Without `get_screenshot`, only an already stored screenshot is used: a live
+    grab here would block the loop during the router call this is meant to overlap.
+    """
+    if get_screenshot is None:
+        screenshot = _take_stored_screenshot()
+        if screenshot is None:
+            return None, None
+    else:
+        try:
+            screenshot = get_screenshot()
+        except Exception as exc:
+            print(f"[Router] Skipping speculative screen context: {exc}")
+            return None, None
+    task = asyncio.create_task(
+        model.generate_screen_context(user_request=user_prompt, image=screenshot)
+    )
+    return task, screenshot
+
+
+def _discard_speculative_task(task: asyncio.Task) -> None:
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        # Retrieve any exception so it is not reported as unhandled.
+        task.exception()
+
+
+async def _cancel_speculative_task(task: asyncio.Task) -> None:
+    """Cancel a speculative call and wait for it to unwind so its request stops now."""
+    _discard_speculative_task(task)
+    await asyncio.gather(task, return_exceptions=True)
+
+
+def _speculation_matches(user_prompt: str, judge_task: str, focus: str) -> bool:
+    """True when the router asked for the same screen context the speculative call computes."""
+    if _normalize_route_prompt(focus):
+        return False
+    return _normalize_route_prompt(judge_task) == _normalize_route_prompt(user_prompt)
+
+
 # ================================================================================
 # MAIN ENTRY POINT
 # ================================================================================
@@ -575,7 +992,13 @@ async def call_gemini(user_prompt: str, rapid_response_model: str, clovis_model:
     1. Rapid response model (router) decides how to handle the request
     2. Routes to appropriate agent: CLOVIS, Browser, or Desktop
     """
-    model = GeminiModel(
+    overrides = CALL_GEMINI_OVERRIDES.get() or {}
+    model_cls = overrides.get("GeminiModel", GeminiModel)
+    run_step = overrides.get("run_routed_agent_step", _run_routed_agent_step)
+    get_screenshot = overrides.get("get_stored_screenshot", get_stored_screenshot)
+    direct_tool = overrides.get("direct_response", ROUTER_TOOL_MAP.get("direct_response"))
+
+    model = model_cls(
         clovis_model=clovis_model,
         rapid_response_model=rapid_response_model
     )
@@ -583,8 +1006,10 @@ async def call_gemini(user_prompt: str, rapid_response_model: str, clovis_model:
     _append_rapid_history("user", user_prompt, "user")
 
     chain_steps: list[dict[str, Any]] = []
-    seen_step_signatures: dict[tuple[str, str], int] = {}
+    seen_step_signatures: Counter[tuple[str, str]] = Counter()
     latest_screen_context: Optional[dict[str, Any]] = None
+    speculative_screen_task: Optional[asyncio.Task] = None
+    speculative_screenshot = None
 
     for step_index in range(_MAX_ROUTER_CHAIN_STEPS):
         history_block = _format_rapid_history_for_prompt()
@@ -600,13 +1025,42 @@ async def call_gemini(user_prompt: str, rapid_response_model: str, clovis_model:
             + chain_block
             + f"\n# User's Latest Request:\n{user_prompt}"
         )
-        routing_result = await model.route_request(rapid_prompt)
+        routing_result = _fast_route(user_prompt) if step_index == 0 else None
+        if routing_result is not None:
+            print(f"[Router] Fast route: agent={routing_result['agent']}")
+        else:
+            if step_index == 0 and _looks_screen_referential(user_prompt):
+                speculative_screen_task, speculative_screenshot = _start_speculative_screen_context(
+                    model,
+                    user_prompt,
+                    overrides.get("get_stored_screenshot"),
+                )
+            try:
+                routing_result = await model.route_request(
+                    rapid_prompt,
+                    cache_scope=(
+                        user_prompt,
+                        _route_context_signature(chain_steps, latest_screen_context, history_block),
+                    ),
+                )
+            except BaseException:
+                if speculative_screen_task is not None:
+                    _discard_speculative_task(speculative_screen_task)
+                raise
         if not isinstance(routing_result, dict):
             routing_result = {
                 "agent": "direct",
                 "response_text": "Router returned an invalid response shape.",
             }
 
+        if speculative_screen_task is not None and routing_result.get("agent") != "screen_context":
+            await _cancel_speculative_task(speculative_screen_task)
+            # Only a screenshot taken from the store goes back; an override's image never does.
+            if "get_stored_screenshot" not in overrides:
+                _restore_stored_screenshot(speculative_screenshot)
+            speculative_screen_task = None
+            speculative_screenshot = None
+
         if routing_result.get("agent") == "direct":
             direct_args = routing_result.get("direct_response_args")
             if not isinstance(direct_args, dict):
@@ -617,24 +1071,23 @@ async def call_gemini(user_prompt: str, rapid_response_model: str, clovis_model:
                 chain_steps=chain_steps,
                 text=_clean_text(raw_direct_text, "Rapid response provided.", max_len=420),
             )
-            tool = ROUTER_TOOL_MAP.get("direct_response")
-            if tool:
+            if direct_tool:
                 safe_args = dict(direct_args)
                 safe_args.pop("text", None)
-                tool(text=direct_text, source="rapid_response", **safe_args)
+                direct_tool(text=direct_text, source="rapid_response", **safe_args)
             _append_rapid_history("assistant", direct_text, "rapid")
             return
 
-        signature = _routing_signature(routing_result)
-        seen_step_signatures[signature] = seen_step_signatures.get(signature, 0) + 1
+        task_text = _routing_task_text(routing_result)
+        signature = _routing_signature(routing_result, task_text)
+        seen_step_signatures[signature] += 1
         if seen_step_signatures[signature] >= _REPEATED_STEP_LIMIT:
             repeated_msg = (
                 "I stopped automatic multi-agent chaining because the next delegated step "
                 "kept repeating. Please rephrase or ask for one specific next action."
             )
-            tool = ROUTER_TOOL_MAP.get("direct_response")
-            if tool:
-                tool(text=repeated_msg, source="rapid_response")
+            if direct_tool:
+                direct_tool(text=repeated_msg, source="rapid_response")
             _append_rapid_history("assistant", repeated_msg, "rapid")
             return
 
@@ -645,13 +1098,25 @@ async def call_gemini(user_prompt: str, rapid_response_model: str, clovis_model:
                 f"[Router][Chain] Step {step_index + 1}/{_MAX_ROUTER_CHAIN_STEPS}: "
                 f"agent=screen_context task={_clean_text(judge_task, '', max_len=200)}"
             )
-            screenshot = get_stored_screenshot()
-            try:
-                latest_screen_context = await model.generate_screen_context(
+            if speculative_screen_task is not None and _speculation_matches(user_prompt, judge_task, focus):
+                screen_context_call = speculative_screen_task
+            else:
+                if speculative_screen_task is not None:
+                    # The router narrowed the task or added a focus; rerun with its args
+                    # on the screenshot the speculative call already took.
+                    await _cancel_speculative_task(speculative_screen_task)
+                    image = speculative_screenshot
+                else:
+                    image = get_screenshot()
+                screen_context_call = model.generate_screen_context(
                     user_request=judge_task,
-                    image=screenshot,
+                    image=image,
                     focus=focus,
                 )
+            speculative_screen_task = None
+            speculative_screenshot = None
+            try:
+                latest_screen_context = await screen_context_call
                 message = _screen_context_message(latest_screen_context)
                 step_result = {
                     "agent": "screen_context",
@@ -680,18 +1145,17 @@ async def call_gemini(user_prompt: str, rapid_response_model: str, clovis_model:
                     f"Stopping chained execution because screen context failed: "
                     f"{step_result.get('message')}"
                 )
-                tool = ROUTER_TOOL_MAP.get("direct_response")
-                if tool:
-                    tool(text=_clean_text(failure_msg, "Task failed.", max_len=420), source="rapid_response")
+                if direct_tool:
+                    direct_tool(text=_clean_text(failure_msg, "Task failed.", max_len=420), source="rapid_response")
                 _append_rapid_history("assistant", failure_msg, "rapid")
                 return
             continue
 
         print(
             f"[Router][Chain] Step {step_index + 1}/{_MAX_ROUTER_CHAIN_STEPS}: "
-            f"agent={routing_result.get('agent')} task={_routing_task_text(routing_result)}"
+            f"agent={routing_result.get('agent')} task={task_text}"
         )
-        step_result = await _run_routed_agent_step(
+        step_result = await run_step(
             model=model,
             routing_result=routing_result,
             clovis_model=clovis_model,
@@ -707,9 +1171,8 @@ async def call_gemini(user_prompt: str, rapid_response_model: str, clovis_model:
                 f"Stopping chained execution because {step_result.get('agent')} failed: "
                 f"{step_result.get('message')}"
             )
-            tool = ROUTER_TOOL_MAP.get("direct_response")
-            if tool:
-                tool(text=_clean_text(failure_msg, "Task failed.", max_len=420), source="rapid_response")
+            if direct_tool:
+                direct_tool(text=_clean_text(failure_msg, "Task failed.", max_len=420), source="rapid_response")
             _append_rapid_history("assistant", failure_msg, "rapid")
             return
 
@@ -717,12 +1180,59 @@ async def call_gemini(user_prompt: str, rapid_response_model: str, clovis_model:
         f"I stopped after {_MAX_ROUTER_CHAIN_STEPS} delegated steps to avoid loops. "
         "If you want me to continue, ask for the next specific step."
     )
-    tool = ROUTER_TOOL_MAP.get("direct_response")
-    if tool:
-        tool(text=max_step_msg, source="rapid_response")
+    if direct_tool:
+        direct_tool(text=max_step_msg, source="rapid_response")
     _append_rapid_history("assistant", max_step_msg, "rapid")
 
 
+# ================================================================================
+# SHARED GEMINI CLIENT + CONFIGS
+# ================================================================================
+
+@functools.lru_cache(maxsize=1)
+def _get_genai_client() -> "genai.Client":
+    """Return the process-wide Gemini client so its connection pool is reused."""
+    return genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+
+
+# Config for router model (lightweight, no thinking)
+_ROUTER_CONFIG = types.GenerateContentConfig(
+    temperature=0.7,
+    max_output_tokens=1000,
+    tools=ROUTER_TOOLS,
+    tool_config=TOOL_CONFIG,
+)
+
+# Config for CLOVIS model (full capabilities)
+_CLOVIS_CONFIG = types.GenerateContentConfig(
+    temperature=1.2,
+    top_p=0.95,
+    top_k=64,
+    max_output_tokens=3000,
+    thinking_config=types.ThinkingConfig(thinking_budget=1024),
+    tools=CLOVIS_TOOLS,
+    tool_config=TOOL_CONFIG,
+)
+
+# Config for one-shot screen context extraction (no tools, strict JSON response).
+_SCREEN_JUDGE_CONFIG = types.GenerateContentConfig(
+    temperature=0.2,
+    top_p=0.9,
+    top_k=40,
+    max_output_tokens=1200,
+    response_mime_type="application/json",
+)
+
+# Batch job states after which polling stops.
+_BATCH_TERMINAL_STATES = {
+    types.JobState.JOB_STATE_SUCCEEDED,
+    types.JobState.JOB_STATE_PARTIALLY_SUCCEEDED,
+    types.JobState.JOB_STATE_FAILED,
+    types.JobState.JOB_STATE_CANCELLED,
+    types.JobState.JOB_STATE_EXPIRED,
+}
+
+
 # ================================================================================
 # GEMINI MODEL CLASS
 # ================================================================================
@@ -739,43 +1249,59 @@ class GeminiModel:
     """
 
     def __init__(self, clovis_model='gemini-3-flash-preview', rapid_response_model='gemini-flash-lite-latest'):
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        self.client = _get_genai_client()
         self.clovis_model = clovis_model
         self.rapid_response_model = rapid_response_model
         self.screen_judge_model = "gemini-3-flash-preview"
+        self.upload_max_edge = _UPLOAD_MAX_EDGE
 
-        # Config for router model (lightweight, no thinking)
-        self.router_config = types.GenerateContentConfig(
-            temperature=0.7,
-            max_output_tokens=1000,
-            tools=ROUTER_TOOLS,
-            tool_config=TOOL_CONFIG,
-        )
+        self.router_config = _ROUTER_CONFIG
+        self.clovis_config = _CLOVIS_CONFIG
+        self.screen_judge_config = _SCREEN_JUDGE_CONFIG
 
-        # Config for CLOVIS model (full capabilities)
-        self.clovis_config = types.GenerateContentConfig(
-            temperature=1.2,
-            top_p=0.95,
-            top_k=64,
-            max_output_tokens=3000,
-            thinking_config=types.ThinkingConfig(thinking_budget=1024),
-            tools=CLOVIS_TOOLS,
-            tool_config=TOOL_CONFIG,
-        )
+    async def _image_part(self, image: Image.Image, digest: Optional[str] = None) -> "types.Part":
+        """
+        Return the upload part for a screenshot, reusing an uploaded file when possible.
 
-        # Config for one-shot screen context extraction (no tools, strict JSON response).
-        self.screen_judge_config = types.GenerateContentConfig(
-            temperature=0.2,
-            top_p=0.9,
-            top_k=40,
-            max_output_tokens=1200,
-            response_mime_type="application/json",
-        )
+        Screenshots are sent inline. Only when the same pixels come back a second
+        time is a Files API upload started in the background; once it lands, later
+        calls reference the uploaded file instead of re-sending the bytes.
+        """
+        digest = f"{digest or _image_digest(image)}:{self.upload_max_edge}"
+        uploaded = _get_uploaded_image_part(digest)
+        if uploaded is not None:
+            return uploaded
+
+        part = _prepare_image_for_upload(image, self.upload_max_edge)
+        if _mark_image_seen(digest) and digest not in _PENDING_IMAGE_UPLOADS:
+            _PENDING_IMAGE_UPLOADS[digest] = asyncio.create_task(
+                self._upload_image_part(digest, part)
+            )
+        return part
+
+    async def _upload_image_part(self, digest: str, part: "types.Part") -> None:
+        try:
+            uploaded = await self.client.aio.files.upload(
+                file=io.BytesIO(part.inline_data.data),
+                config=types.UploadFileConfig(mime_type=part.inline_data.mime_type),
+            )
+            _store_uploaded_image_part(
+                digest,
+                types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type),
+                uploaded.name,
+            )
+        except Exception as exc:
+            print(f"[Gemini] Screenshot upload for reuse failed: {exc}")
+        finally:
+            _PENDING_IMAGE_UPLOADS.pop(digest, None)
 
-    async def route_request(self, prompt: str) -> dict:
+    async def route_request(self, prompt: str, cache_scope: Optional[tuple[str, str]] = None) -> dict:
         """
         Use the router model to decide how to handle the request.
 
+        `cache_scope` is (user prompt, context signature). When given, agent routes
+        are cached under it; direct answers are never cached.
+
         Returns:
             dict with keys:
                 - agent: "direct" | "clovis" | "browser" | "cua_cli" | "cua_vision" | "screen_context"
@@ -783,15 +1309,33 @@ class GeminiModel:
                 - response_text: direct response text when agent == "direct"
                 - Additional agent-specific params
         """
+        key = ("route_request", self.rapid_response_model, _normalize_route_prompt(prompt))
+        return await _coalesce_inflight(key, lambda: self._route_request(prompt, cache_scope))
+
+    async def _route_request(self, prompt: str, cache_scope: Optional[tuple[str, str]] = None) -> dict:
         print("[Router] Processing...")
         await set_model_name(self.rapid_response_model)
 
+        cache_key = None
+        if cache_scope is not None:
+            cache_key = _route_cache_key(self.rapid_response_model, *cache_scope)
+            cached = _get_cached_route(cache_key)
+            if cached is not None:
+                print("[Router] Cache hit")
+                return cached
+
         try:
-            response = await self.client.aio.models.generate_content(
-                model=self.rapid_response_model,
-                contents=[prompt],
-                config=self.router_config
-            )
+            async with asyncio.timeout(_ROUTER_TIMEOUT_S):
+                response = await self.client.aio.models.generate_content(
+                    model=self.rapid_response_model,
+                    contents=[prompt],
+                    config=self.router_config
+                )
+        except TimeoutError:
+            return {
+                "agent": "direct",
+                "response_text": f"Router timed out after {_ROUTER_TIMEOUT_S:.0f}s. Please try again.",
+            }
         except Exception as exc:
             return {
                 "agent": "direct",
@@ -802,21 +1346,10 @@ class GeminiModel:
                 ),
             }
 
-        candidates = getattr(response, "candidates", None)
-        if not candidates:
-            fallback_text = _clean_text(
-                getattr(response, "text", None),
-                "Router returned no candidates.",
-                max_len=420,
-            )
-            return {"agent": "direct", "response_text": fallback_text}
-
-        first_candidate = candidates[0] if len(candidates) > 0 else None
-        if first_candidate is None:
-            return {"agent": "direct", "response_text": "Router returned an empty candidate."}
-
-        content = getattr(first_candidate, "content", None)
-        parts = getattr(content, "parts", None) if content is not None else None
+        try:
+            parts = response.candidates[0].content.parts
+        except (AttributeError, IndexError, TypeError):
+            parts = None
         if not parts:
             fallback_text = _clean_text(
                 getattr(response, "text", None),
@@ -825,50 +1358,27 @@ class GeminiModel:
             )
             return {"agent": "direct", "response_text": fallback_text}
 
-        function_calls = [part.function_call for part in parts if getattr(part, "function_call", None)]
+        function_calls = [fc for part in parts if (fc := part.function_call) is not None]
 
         for function_call in function_calls:
             print(f"\n[Router] Function: {function_call.name}")
             print(f"[Router] Arguments: {function_call.args}")
             args = function_call.args if isinstance(function_call.args, dict) else {}
 
-            if function_call.name == "invoke_clovis":
-                return {
-                    "agent": "clovis",
-                    "query": args.get("query", "")
-                }
-
-            elif function_call.name == "invoke_browser":
-                return {
-                    "agent": "browser",
-                    "task": args.get("task", "")
-                }
-
-            elif function_call.name == "invoke_cua_cli":
-                return {
-                    "agent": "cua_cli",
-                    "task": args.get("task", "")
-                }
-
-            elif function_call.name == "invoke_cua_vision":
-                return {
-                    "agent": "cua_vision",
-                    "task": args.get("task", "")
-                }
-
-            elif function_call.name == "request_screen_context":
-                return {
-                    "agent": "screen_context",
-                    "task": args.get("task", ""),
-                    "focus": args.get("focus", ""),
-                }
-
-            elif function_call.name == "direct_response":
-                return {
-                    "agent": "direct",
-                    "response_text": args.get("text", ""),
-                    "direct_response_args": args,
-                }
+            entry = _ROUTER_DISPATCH.get(function_call.name)
+            if entry is None:
+                continue
+            agent, arg_keys = entry
+            routed = {"agent": agent}
+            for result_key, arg_key in arg_keys:
+                routed[result_key] = args.get(arg_key, "")
+            if agent == "direct":
+                routed["direct_response_args"] = args
+
+            # Only the routing decision is reusable; direct answer text can go stale.
+            if cache_key is not None and agent != "direct":
+                _store_cached_route(cache_key, routed)
+            return routed
 
         # No function call - shouldn't happen with mode="ANY"
         print("[Router] No function call in response")
@@ -883,91 +1393,211 @@ class GeminiModel:
         """
         Run one multimodal pass to extract concrete screen context for routing.
         """
-        print("[ScreenJudge] Capturing context from screenshot...")
-        focus_text = _clean_text(focus, "", max_len=200)
-        judge_prompt = (
-            "You are Screen Judge for a computer-use orchestrator.\n"
-            "Analyze the screenshot and extract only high-signal routing context.\n"
-            "Return JSON ONLY, no markdown.\n\n"
-            "Required JSON schema:\n"
-            "{\n"
-            '  "summary": "short factual summary",\n'
-            '  "repo_url": "github/git url if visible else empty string",\n'
-            '  "local_url": "localhost/127.0.0.1 URL if visible else empty string",\n'
-            '  "recommended_agent": "cua_cli|cua_vision|browser|clovis|direct",\n'
-            '  "recommended_task": "single concrete next step task",\n'
-            '  "hints": "short extra details useful for routing"\n'
-            "}\n\n"
-            f"User request: {user_request}\n"
-            f"Extraction focus: {focus_text if focus_text else 'general execution context'}\n"
-            "Do not invent URLs. If uncertain, leave fields empty."
+        digest = _image_digest(image)
+        key = (
+            "generate_screen_context",
+            self.screen_judge_model,
+            _normalize_route_prompt(user_request),
+            _normalize_route_prompt(focus),
+            digest,
+        )
+        return await _coalesce_inflight(
+            key,
+            lambda: self._generate_screen_context(user_request, image, focus, digest),
         )
 
-        contents = [judge_prompt]
+    async def _generate_screen_context(
+        self,
+        user_request: str,
+        image: Image = None,
+        focus: str = "",
+        digest: Optional[str] = None,
+    ) -> dict[str, Any]:
+        print("[ScreenJudge] Capturing context from screenshot...")
+        contents = [_build_screen_judge_prompt(user_request, focus)]
         if image is not None:
-            contents.append(image)
-
-        response = await self.client.aio.models.generate_content(
-            model=self.screen_judge_model,
-            contents=contents,
-            config=self.screen_judge_config,
-        )
+            contents.append(await self._image_part(image, digest))
 
-        raw_text = ""
-        if hasattr(response, "text") and response.text:
-            raw_text = str(response.text)
-        else:
-            try:
-                raw_text = json.dumps(response.to_dict())
-            except Exception:
-                raw_text = ""
+        try:
+            async with asyncio.timeout(_SCREEN_CONTEXT_TIMEOUT_S):
+                response = await self.client.aio.models.generate_content(
+                    model=self.screen_judge_model,
+                    contents=contents,
+                    config=self.screen_judge_config,
+                )
+        except TimeoutError as exc:
+            raise TimeoutError(
+                f"Screen context timed out after {_SCREEN_CONTEXT_TIMEOUT_S:.0f}s."
+            ) from exc
 
-        parsed = _parse_json_object_from_text(raw_text)
-        normalized = _normalize_screen_context_payload(parsed, user_request=user_request)
-        if not normalized.get("summary"):
-            normalized["summary"] = _clean_text(raw_text, "Screen context captured.", max_len=420)
+        normalized = _screen_context_from_response(response, user_request)
         normalized["model"] = self.screen_judge_model
         return normalized
 
+    async def generate_screen_context_batch(
+        self,
+        requests: list[tuple[str, Optional[Image.Image], str]],
+        poll_interval_s: float = 15.0,
+    ) -> list[dict[str, Any]]:
+        """
+        Extract screen context for many screenshots through the Gemini Batch API.
+
+        Batch jobs cost half as much as online calls but complete asynchronously,
+        so this is meant for offline work (re-annotation, eval harnesses). Interactive
+        routing should keep using `generate_screen_context`.
+
+        Args:
+            requests: (user_request, image, focus) tuples, one per screenshot.
+            poll_interval_s: Seconds to wait between job status checks.
+
+        Returns:
+            One normalized screen context dict per request, in input order. Entries
+            whose batch response failed come back with an empty payload.
+        """
+        if not requests:
+            return []
+
+        inlined_requests = []
+        for index, (user_request, image, focus) in enumerate(requests):
+            contents = [_build_screen_judge_prompt(user_request, focus)]
+            if image is not None:
+                contents.append(_prepare_image_for_upload(image, self.upload_max_edge))
+            inlined_requests.append(
+                types.InlinedRequest(
+                    contents=contents,
+                    config=self.screen_judge_config,
+                    metadata={"custom_id": str(index)},
+                )
+            )
+
+        print(f"[ScreenJudge] Submitting batch of {len(inlined_requests)} screenshots...")
+        job = await self.client.aio.batches.create(
+            model=self.screen_judge_model,
+            src=inlined_requests,
+        )
+        while job.state not in _BATCH_TERMINAL_STATES:
+            await asyncio.sleep(poll_interval_s)
+            job = await self.client.aio.batches.get(name=job.name)
+
+        if job.state not in {
+            types.JobState.JOB_STATE_SUCCEEDED,
+            types.JobState.JOB_STATE_PARTIALLY_SUCCEEDED,
+        }:
+            raise RuntimeError(f"[ScreenJudge] Batch job {job.name} ended in state {job.state}")
+
+        inlined_responses = (job.dest.inlined_responses if job.dest else None) or []
+        responses_by_id: dict[int, Any] = {}
+        for position, inlined in enumerate(inlined_responses):
+            custom_id = (inlined.metadata or {}).get("custom_id", str(position))
+            responses_by_id[int(custom_id)] = inlined.response
+
+        results = []
+        for index, (user_request, _image, _focus) in enumerate(requests):
+            normalized = _screen_context_from_response(responses_by_id.get(index), user_request)
+            normalized["model"] = self.screen_judge_model
+            results.append(normalized)
+        return results
+
     async def generate_clovis_response(self, prompt: str, image: Image = None) -> dict[str, Any]:
         """
         Call the CLOVIS model with full screen annotation capabilities.
         """
+        digest = _image_digest(image) if image else None
+        key = (
+            "generate_clovis_response",
+            self.clovis_model,
+            _normalize_route_prompt(prompt),
+            digest,
+        )
+        return await _coalesce_inflight(
+            key,
+            lambda: self._generate_clovis_response(prompt, image, digest),
+        )
+
+    async def _generate_clovis_response(
+        self,
+        prompt: str,
+        image: Image = None,
+        digest: Optional[str] = None,
+    ) -> dict[str, Any]:
         print("[CLOVIS] Processing with screenshot...")
         await set_model_name(self.clovis_model)
 
         contents = [prompt]
         if image:
-            contents.append(image)
-
-        response = await self.client.aio.models.generate_content(
-            model=self.clovis_model,
-            contents=contents,
-            config=self.clovis_config
-        )
-
-        parts = response.candidates[0].content.parts
-        function_calls = [part.function_call for part in parts if part.function_call]
+            contents.append(await self._image_part(image, digest))
+
+        # Buffer streamed text parts and join once; repeated += is quadratic on long outputs.
+        # Tool calls are dispatched as they arrive and text deltas are mirrored to the
+        # status bubble so the user sees progress before the stream finishes.
+        text_chunks: list[str] = []
+        # Last stretch of streamed text for the status bubble, so previews never re-join the whole output.
+        preview_tail = ""
+        saw_function_call = False
+        streamed_status = False
         summary_text = None
+        response = None
+        loop = asyncio.get_running_loop()
+        try:
+            # Idle timeout: the deadline is pushed back every time a chunk arrives.
+            async with asyncio.timeout(_CLOVIS_STREAM_IDLE_TIMEOUT_S) as deadline:
+                stream = await self.client.aio.models.generate_content_stream(
+                    model=self.clovis_model,
+                    contents=contents,
+                    config=self.clovis_config
+                )
 
-        if function_calls:
-            for function_call in function_calls:
-                print(f"\n[CLOVIS] Function: {function_call.name}")
-                print(f"[CLOVIS] Arguments: {function_call.args}")
-
-                if function_call.name == "direct_response":
-                    summary_text = function_call.args.get("text") or summary_text
-
-                tool = CLOVIS_TOOL_MAP.get(function_call.name)
-                if tool:
-                    tool(**function_call.args)
-                else:
-                    raise Exception(f"[CLOVIS] Invalid tool: {function_call.name}")
-        else:
+                async for chunk in stream:
+                    deadline.reschedule(loop.time() + _CLOVIS_STREAM_IDLE_TIMEOUT_S)
+                    response = chunk
+                    candidates = chunk.candidates or []
+                    content = candidates[0].content if candidates else None
+                    for part in (content.parts or []) if content is not None else []:
+                        function_call = part.function_call
+                        if function_call:
+                            saw_function_call = True
+                            print(f"\n[CLOVIS] Function: {function_call.name}")
+                            print(f"[CLOVIS] Arguments: {function_call.args}")
+
+                            if function_call.name == "direct_response":
+                                summary_text = function_call.args.get("text") or summary_text
+
+                            tool = CLOVIS_TOOL_MAP.get(function_call.name)
+                            if tool:
+                                tool(**function_call.args)
+                            else:
+                                raise Exception(f"[CLOVIS] Invalid tool: {function_call.name}")
+                        elif part.text and not part.thought:
+                            text_chunks.append(part.text)
+                            preview_tail = (preview_tail + part.text)[-_CLOVIS_PREVIEW_CHARS:]
+                            preview = _clean_text(preview_tail, "", max_len=_CLOVIS_PREVIEW_CHARS)
+                            if not streamed_status:
+                                streamed_status = True
+                                await _start_non_rapid_status(preview, source="clovis")
+                            else:
+                                await _safe_ui_call(
+                                    update_status_bubble(preview, source="clovis"),
+                                    "update_status_bubble",
+                                )
+        except TimeoutError as exc:
+            message = f"CLOVIS response stalled for {_CLOVIS_STREAM_IDLE_TIMEOUT_S:.0f}s."
+            if streamed_status:
+                await _finish_non_rapid_status(message, False, source="clovis")
+            raise TimeoutError(message) from exc
+
+        if not saw_function_call:
             print("[CLOVIS] No function call in response")
-            if response.text:
-                print(response.text)
-                summary_text = response.text
+            response_text = "".join(text_chunks)
+            if response_text:
+                print(response_text)
+                summary_text = response_text
+
+        if streamed_status:
+            await _finish_non_rapid_status(
+                _clean_text(summary_text, "CLOVIS response complete.", max_len=420),
+                True,
+                source="clovis",
+            )
 
         return {
             "response": response,
@@ -1,9 +1,12 @@
 """
 Router System Prompt - Instructions for the rapid response routing model.
 """
+import functools
+
 from core.settings import get_personalization_config
 
 
+@functools.lru_cache(maxsize=1)
 def _get_personality_section() -> str:
     """Get personality section for prompt, or empty string if not configured."""
     personalization = get_personalization_config()[0]
@@ -3,6 +3,8 @@ import os
 import sys
 from typing import Optional, Tuple
 
+import numpy as np
+
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, ROOT_DIR)
 
@@ -16,8 +18,9 @@ from agents.clovis.tools import (
 )
 
 try:
-    from PIL import ImageGrab
+    from PIL import Image, ImageGrab
 except Exception:
+    Image = None
     ImageGrab = None
 
 
@@ -25,19 +28,21 @@ def _find_light_point(step: int = 80, threshold: int = 200) -> Optional[Tuple[in
     if ImageGrab is None:
         return None
     try:
-        image = ImageGrab.grab().convert("RGB")
+        image = ImageGrab.grab()
     except Exception:
         return None
     width, height = image.size
     if width <= 0 or height <= 0:
         return None
-    for y in range(0, height, step):
-        for x in range(0, width, step):
-            r, g, b = image.getpixel((x, y))
-            luminance = (0.2126 * r) + (0.7152 * g) + (0.0722 * b)
-            if luminance >= threshold:
-                return x, y
-    return None
+    # Downscale by `step` first so the scan touches one pixel per grid cell.
+    thumbnail_size = (max(1, width // step), max(1, height // step))
+    image = image.resize(thumbnail_size, Image.BILINEAR).convert("RGB")
+    pixels = np.asarray(image, dtype=np.uint8)
+    luminance = pixels @ np.array([0.2126, 0.7152, 0.0722])
+    ys, xs = np.nonzero(luminance >= threshold)
+    if ys.size == 0:
+        return None
+    return int(xs[0]) * step, int(ys[0]) * step
 
 
 async def run_overlay_smoke_test():
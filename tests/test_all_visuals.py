@@ -30,6 +30,11 @@ from agents.clovis.tools import (
 from tests.test_status_bubble_cua_cli import simulate_cua_cli_agent
 from tests.test_status_bubble_cua_vision import simulate_cua_vision_agent
 
+# Upper bound on waiting for the renderer to paint a sequence's final element.
+FRAME_TIMEOUT_S = 6.0
+# Brief hold after the final frame lands so the completed sequence is visible.
+FRAME_HOLD_S = 0.8
+
 
 async def _show_stage_popup(label: str, duration: float = 1.2):
     width, height = get_screen_size()
@@ -51,7 +56,7 @@ async def _show_stage_popup(label: str, duration: float = 1.2):
     await _destroy_text(popup_id)
 
 
-async def _run_box_sequence():
+async def _run_box_sequence(server: VisualizationServer):
     # Matches box_test visuals without creating another server loop.
     draw_bounding_box(
         0.0,
@@ -112,10 +117,11 @@ async def _run_box_sequence():
     box = {"x": 200, "y": 160, "width": 400, "height": 600}
     create_text_for_box(0.8, box, "Box label", position="top")
 
-    await asyncio.sleep(3.6)
+    await server.wait_for_frame("all_box_4", timeout=FRAME_TIMEOUT_S)
+    await asyncio.sleep(FRAME_HOLD_S)
 
 
-async def _run_points_sequence():
+async def _run_points_sequence(server: VisualizationServer):
     # Matches points_test visuals without creating another server loop.
     draw_pointer_to_object(
         time=0.2,
@@ -172,7 +178,8 @@ async def _run_points_sequence():
         ring_color="#9AC7FF",
     )
 
-    await asyncio.sleep(4.2)
+    await server.wait_for_frame("all_point_5_text", timeout=FRAME_TIMEOUT_S)
+    await asyncio.sleep(FRAME_HOLD_S)
 
 
 async def _clear_between_steps():
@@ -185,7 +192,7 @@ async def run_test_all_visuals():
     settings_path = os.path.join(os.path.dirname(__file__), "..", "settings.json")
     host, port = set_host_and_port(settings_path)
 
-    server = VisualizationServer(host=host, port=port)
+    server = VisualizationServer(host=host, port=port, frame_acks=True)
     await server.start()
     print("[test_all_visuals] Waiting for client connection...")
     await server.wait_for_client()
@@ -196,12 +203,12 @@ async def run_test_all_visuals():
 
         print("[test_all_visuals] Running box_test sequence...")
         await _show_stage_popup("Running: box_test")
-        await _run_box_sequence()
+        await _run_box_sequence(server)
         await _clear_between_steps()
 
         print("[test_all_visuals] Running points_test sequence...")
         await _show_stage_popup("Running: points_test")
-        await _run_points_sequence()
+        await _run_points_sequence(server)
         await _clear_between_steps()
 
         print("[test_all_visuals] Running cua_cli sequence...")
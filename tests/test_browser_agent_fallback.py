@@ -6,12 +6,24 @@ Usage:
 """
 
 import asyncio
+import json
 import os
 import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import urlparse
 
-ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-sys.path.insert(0, ROOT_DIR)
+try:
+    import uvloop
+except ImportError:  # Optional: faster loop for these scheduling-bound checks.
+    uvloop = None
 
+if __package__ in (None, ""):
+    # Run directly as a script; pytest and `python -m tests.<name>` already see the repo root.
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import agents.browser.agent as browser_agent_module
 from agents.browser.agent import BrowserAgent
 
 
@@ -20,9 +32,11 @@ class _FakePage:
         self.url = url
         self._title_text = title_text
         self.goto_calls: list[str] = []
+        self.goto_hosts: set[str] = set()
 
     async def goto(self, url: str, wait_until: str = "domcontentloaded", timeout: int = 30000):
         self.goto_calls.append(url)
+        self.goto_hosts.add(urlparse(url).hostname or "")
         self.url = url
 
     async def wait_for_timeout(self, ms: int):
@@ -38,6 +52,16 @@ class _FakePage:
 class _FakeContext:
     def __init__(self, pages):
         self.pages = pages
+        self.storage_state_paths: list[str] = []
+        self.last_state = None
+
+    async def storage_state(self, path: str = None):
+        state = {"cookies": [{"name": "session", "value": "fake"}], "origins": []}
+        self.last_state = state
+        self.storage_state_paths.append(path)
+        if path:
+            Path(path).write_text(json.dumps(state))
+        return state
 
     async def new_page(self):
         page = _FakePage("about:blank", "Blank")
@@ -45,15 +69,8 @@ class _FakeContext:
         return page
 
 
-async def _run_backend_reuse_check() -> None:
-    agent = BrowserAgent(model_name="test-model")
+async def _run_backend_reuse_check(agent: BrowserAgent) -> None:
     cls = BrowserAgent
-
-    original_backend = cls._shared_backend
-    original_close = cls._close_shared_resources
-    original_execute_browser_use = agent._execute_with_browser_use
-    original_execute_playwright = agent._execute_with_playwright
-
     calls: list[str] = []
 
     async def _fake_close_shared_resources(inner_cls):
@@ -67,10 +84,12 @@ async def _run_backend_reuse_check() -> None:
         calls.append(f"playwright:{task}")
         return {"success": True, "result": task, "error": None}
 
-    cls._close_shared_resources = classmethod(_fake_close_shared_resources)
-    agent._execute_with_browser_use = _fake_execute_browser_use
-    agent._execute_with_playwright = _fake_execute_playwright
-    try:
+    with (
+        patch.object(cls, "_shared_backend", cls._shared_backend),
+        patch.object(cls, "_close_shared_resources", classmethod(_fake_close_shared_resources)),
+        patch.object(agent, "_execute_with_browser_use", _fake_execute_browser_use),
+        patch.object(agent, "_execute_with_playwright", _fake_execute_playwright),
+    ):
         cls._shared_backend = "browser_use"
         result = await agent.execute("task-1")
         assert result["success"]
@@ -80,22 +99,10 @@ async def _run_backend_reuse_check() -> None:
         result = await agent.execute("task-2")
         assert result["success"]
         assert calls[-1] == "playwright:task-2", calls
-    finally:
-        cls._shared_backend = original_backend
-        cls._close_shared_resources = original_close
-        agent._execute_with_browser_use = original_execute_browser_use
-        agent._execute_with_playwright = original_execute_playwright
 
 
-async def _run_no_search_when_reusing_page_check() -> None:
-    agent = BrowserAgent(model_name="test-model")
+async def _run_no_search_when_reusing_page_check(agent: BrowserAgent) -> None:
     cls = BrowserAgent
-
-    original_context = cls._shared_playwright_context
-    original_page = cls._shared_playwright_page
-    original_get_page = agent._get_or_create_playwright_page
-    original_open_result = agent._open_first_duckduckgo_result
-
     page = _FakePage("http://localhost:3000/", "ScopeGrade")
     context = _FakeContext([page])
 
@@ -105,11 +112,15 @@ async def _run_no_search_when_reusing_page_check() -> None:
     async def _fail_if_search_used(_page):
         raise AssertionError("Search fallback should not execute for current-page tasks.")
 
-    cls._shared_playwright_context = context
-    cls._shared_playwright_page = page
-    agent._get_or_create_playwright_page = _fake_get_or_create_playwright_page
-    agent._open_first_duckduckgo_result = _fail_if_search_used
-    try:
+    state_path = Path(tempfile.mkdtemp(prefix="clovis-browser-state-")) / "browser_state.json"
+
+    with (
+        patch.object(browser_agent_module, "_STORAGE_STATE_PATH", state_path),
+        patch.object(cls, "_shared_playwright_context", context),
+        patch.object(cls, "_shared_playwright_page", page),
+        patch.object(agent, "_get_or_create_playwright_page", _fake_get_or_create_playwright_page),
+        patch.object(agent, "_open_first_duckduckgo_result", _fail_if_search_used),
+    ):
         result = await agent._execute_with_playwright(
             "On the currently open ScopeGrade page, upload ECE_131A_HW5.zip",
             bootstrap_error="",
@@ -118,20 +129,51 @@ async def _run_no_search_when_reusing_page_check() -> None:
         assert result["success"], result
         summary = result["result"]["summary"]
         assert "current-tab context fallback" in summary.lower(), summary
-        assert not any("duckduckgo.com" in url for url in page.goto_calls), page.goto_calls
-    finally:
-        cls._shared_playwright_context = original_context
-        cls._shared_playwright_page = original_page
-        agent._get_or_create_playwright_page = original_get_page
-        agent._open_first_duckduckgo_result = original_open_result
+        assert "duckduckgo.com" not in page.goto_hosts, page.goto_calls
+        # The agent fetches the state and writes the file itself, owner-only.
+        assert context.storage_state_paths == [None], context.storage_state_paths
+        assert state_path.exists(), state_path
+        assert json.loads(state_path.read_text()) == context.last_state, state_path.read_text()
+        assert (state_path.stat().st_mode & 0o777) == 0o600, oct(state_path.stat().st_mode)
+
+
+# (task, expected) tables for the pure string helpers; each case is checked and reported on its own.
+_DIRECT_URL_CASES = [
+    ("Go to https://slac.stanford.edu please", "https://slac.stanford.edu"),
+    ("open stanford.edu", "https://stanford.edu"),
+    ("open localhost 3000", "http://localhost:3000"),
+    ("open localhost:3000", "http://localhost:3000"),
+    ("search for Stanford SLAC website", None),
+]
+
+_CLOSE_AFTER_TASK_CASES = [
+    ("Open YouTube in the browser", False),
+    ("Open YouTube and then close browser", True),
+    ("Open YouTube and keep open", False),
+]
+
+_MUST_AVOID_SEARCH_CASES = [
+    ("On the currently open page, upload this file", True),
+    ("Open localhost 3000", True),
+    ("Open youtube.com", False),
+]
+
+_REQUIRED_STEERING_PHRASES = (
+    "do not perform web search",
+    "currently open localhost page",
+    "temporary hard constraint",
+    "do not type the full task sentence",
+)
+
+
+def _check_cases(func, cases) -> None:
+    for task, expected in cases:
+        actual = func(task)
+        assert actual == expected, f"{func.__name__}({task!r}) -> {actual!r}, expected {expected!r}"
 
 
 def run_checks() -> None:
-    assert BrowserAgent._extract_direct_url("Go to https://slac.stanford.edu please") == "https://slac.stanford.edu"
-    assert BrowserAgent._extract_direct_url("open stanford.edu") == "https://stanford.edu"
-    assert BrowserAgent._extract_direct_url("open localhost 3000") == "http://localhost:3000"
-    assert BrowserAgent._extract_direct_url("open localhost:3000") == "http://localhost:3000"
-    assert BrowserAgent._extract_direct_url("search for Stanford SLAC website") is None
+    _check_cases(BrowserAgent._extract_direct_url, _DIRECT_URL_CASES)
 
     assert BrowserAgent._should_fallback_to_playwright(ModuleNotFoundError("No module named 'x'"))
     assert BrowserAgent._should_fallback_to_playwright(ImportError("Failed to import BrowserSession"))
@@ -145,27 +187,25 @@ def run_checks() -> None:
     executables = BrowserAgent._known_browser_executables()
     assert isinstance(executables, list)
 
-    assert not BrowserAgent._should_close_after_task("Open YouTube in the browser")
-    assert BrowserAgent._should_close_after_task("Open YouTube and then close browser")
-    assert not BrowserAgent._should_close_after_task("Open YouTube and keep open")
+    _check_cases(BrowserAgent._should_close_after_task, _CLOSE_AFTER_TASK_CASES)
     assert BrowserAgent._is_open_new_tab_task("Open a new browser tab")
     assert BrowserAgent._is_current_tab_context_task("On the page that is currently open, upload this file")
     assert BrowserAgent._should_reuse_existing_page("Navigate to the ScopeGrade submission page and upload file")
-    assert BrowserAgent._must_avoid_search("On the currently open page, upload this file")
-    assert BrowserAgent._must_avoid_search("Open localhost 3000")
-    assert not BrowserAgent._must_avoid_search("Open youtube.com")
-    steered = BrowserAgent._steer_task_for_existing_page(
+    _check_cases(BrowserAgent._must_avoid_search, _MUST_AVOID_SEARCH_CASES)
+    steered_lower = BrowserAgent._steer_task_for_existing_page(
         "On the currently open ScopeGrade page, upload ECE_131A_HW5.zip"
-    )
-    assert "do not perform web search" in steered.lower()
-    assert "currently open localhost page" in steered.lower()
-    assert "temporary hard constraint" in steered.lower()
-    assert "do not type the full task sentence" in steered.lower()
+    ).lower()
+    missing = [phrase for phrase in _REQUIRED_STEERING_PHRASES if phrase not in steered_lower]
+    assert not missing, missing
     plain = BrowserAgent._steer_task_for_existing_page("Open youtube.com")
     assert plain == "Open youtube.com"
 
-    asyncio.run(_run_backend_reuse_check())
-    asyncio.run(_run_no_search_when_reusing_page_check())
+    # One loop for all async checks instead of building a fresh loop per check.
+    # Both checks patch and restore their own instance attributes, so one agent serves both.
+    agent = BrowserAgent(model_name="test-model")
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None) as runner:
+        runner.run(_run_backend_reuse_check(agent))
+        runner.run(_run_no_search_when_reusing_page_check(agent))
 
 
 if __name__ == "__main__":
@@ -8,13 +8,38 @@ Usage:
 import asyncio
 import os
 import sys
+from unittest.mock import AsyncMock, patch
 
-ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-sys.path.insert(0, ROOT_DIR)
+try:
+    import uvloop
+except ImportError:  # Optional: faster loop for these scheduling-bound checks.
+    uvloop = None
+
+if __package__ in (None, ""):
+    # Run directly as a script; pytest and `python -m tests.<name>` already see the repo root.
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from agents.cua_cli.agent import CLIAgent
 from agents.cua_cli.agent import CLIResponse
 
+# Sentinel pid handed out by the fake subprocess; never signalled for real.
+_FAKE_PID = 424242
+
+
+class _FakeProc:
+    """Stands in for asyncio.subprocess.Process so no child is ever spawned."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.returncode = None
+
+    async def wait(self) -> int:
+        self.returncode = 0
+        return self.returncode
+
+    def terminate(self) -> None:
+        self.returncode = -15
+
 
 async def run_checks() -> None:
     agent = CLIAgent()
@@ -26,15 +51,24 @@ async def run_checks() -> None:
         "Run this in background and keep it running on localhost: "
         "`sleep 30`"
     )
-    result = await agent.execute(task, timeout=30)
-    assert result.get("success"), result
-
-    processes = CLIAgent.list_background_processes()
-    assert processes, "Expected at least one managed background process"
-    proc_id = processes[0]["id"]
-
-    stopped = await CLIAgent.stop_background_process(proc_id)
-    assert stopped, f"Failed to stop process {proc_id}"
+    signalled: list[int] = []
+    # Only the registry bookkeeping is under test, so spawning and signalling are faked.
+    with (
+        patch("asyncio.create_subprocess_exec", new=AsyncMock(return_value=_FakeProc(pid=_FAKE_PID))),
+        patch("os.getpgid", side_effect=lambda pid: pid),
+        patch("os.killpg", side_effect=lambda pgid, sig: signalled.append(pgid)),
+    ):
+        result = await agent.execute(task, timeout=30)
+        assert result.get("success"), result
+
+        processes = CLIAgent.list_background_processes()
+        assert processes, "Expected at least one managed background process"
+        assert processes[0]["pid"] == _FAKE_PID, processes
+        proc_id = processes[0]["id"]
+
+        stopped = await CLIAgent.stop_background_process(proc_id)
+        assert stopped, f"Failed to stop process {proc_id}"
+        assert signalled == [_FAKE_PID], signalled
 
     processes_after = CLIAgent.list_background_processes()
     assert not processes_after, f"Expected no managed processes, found: {processes_after}"
@@ -54,9 +88,6 @@ async def run_checks() -> None:
         "Clone repo, run npm install, then npm start on localhost"
     )
 
-    original_run_cli = CLIAgent._run_cli
-    original_start_bg = CLIAgent._start_background_process
-
     async def _fake_run_cli(self, task, timeout, status_callback=None):
         return CLIResponse(
             success=False,
@@ -87,9 +118,10 @@ async def run_checks() -> None:
             ],
         }
 
-    CLIAgent._run_cli = _fake_run_cli
-    CLIAgent._start_background_process = classmethod(_fake_start_background_process)
-    try:
+    with (
+        patch.object(CLIAgent, "_run_cli", _fake_run_cli),
+        patch.object(CLIAgent, "_start_background_process", classmethod(_fake_start_background_process)),
+    ):
         timeout_promoted = await agent.execute(
             "go into ~/Desktop/demo-app and run npm start",
             timeout=120,
@@ -97,11 +129,8 @@ async def run_checks() -> None:
         assert timeout_promoted.get("success"), timeout_promoted
         result_text = str(timeout_promoted.get("result", ""))
         assert "Started background process" in result_text, timeout_promoted
-    finally:
-        CLIAgent._run_cli = original_run_cli
-        CLIAgent._start_background_process = original_start_bg
 
 
 if __name__ == "__main__":
-    asyncio.run(run_checks())
+    (uvloop.run if uvloop else asyncio.run)(run_checks())
     print("[test_cli_background_manager] All checks passed.")
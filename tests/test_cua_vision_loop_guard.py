@@ -8,8 +8,9 @@ Usage:
 import os
 import sys
 
-ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-sys.path.insert(0, ROOT_DIR)
+if __package__ in (None, ""):
+    # Run directly as a script; pytest and `python -m tests.<name>` already see the repo root.
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from agents.cua_vision.single_call import (
     SingleCallVisionEngine,
@@ -32,13 +33,13 @@ def test_detects_alternating_position_click_loop() -> None:
     position_sig = ("go_to_element", ("bucket", 24, 7))
     click_sig = ("click_left_click", (("target_description", "Light mode option"),))
 
-    for _ in range(CLICK_CYCLE_LOOP_STOP_THRESHOLD - 1):
-        assert not engine._register_action_and_detect_click_loop(
-            task, "go_to_element", position_sig, None
-        )
-        assert not engine._register_action_and_detect_click_loop(
-            task, "click_left_click", click_sig, "left click"
-        )
+    cycle = [
+        ("go_to_element", position_sig, None),
+        ("click_left_click", click_sig, "left click"),
+    ]
+    assert not engine._register_actions_and_detect_click_loop(
+        task, cycle * (CLICK_CYCLE_LOOP_STOP_THRESHOLD - 1)
+    )
 
     assert not engine._register_action_and_detect_click_loop(
         task, "go_to_element", position_sig, None
@@ -55,13 +56,13 @@ def test_allows_intentional_repeat_click_tasks() -> None:
     position_sig = ("go_to_element", ("bucket", 11, 15))
     click_sig = ("click_left_click", (("target_description", "plus button"),))
 
-    for _ in range(CLICK_CYCLE_LOOP_STOP_THRESHOLD + 3):
-        assert not engine._register_action_and_detect_click_loop(
-            task, "go_to_element", position_sig, None
-        )
-        assert not engine._register_action_and_detect_click_loop(
-            task, "click_left_click", click_sig, "left click"
-        )
+    cycle = [
+        ("go_to_element", position_sig, None),
+        ("click_left_click", click_sig, "left click"),
+    ]
+    assert not engine._register_actions_and_detect_click_loop(
+        task, cycle * (CLICK_CYCLE_LOOP_STOP_THRESHOLD + 3)
+    )
 
 
 if __name__ == "__main__":
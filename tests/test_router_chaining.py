@@ -6,48 +6,83 @@ Usage:
 """
 
 import asyncio
+import contextlib
 import os
 import sys
-from typing import Any
+from collections import ChainMap, deque
+from types import MappingProxyType, SimpleNamespace
+from typing import Any, Mapping, Optional
+from unittest.mock import patch
 
-ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-sys.path.insert(0, ROOT_DIR)
+try:
+    import uvloop
+except ImportError:  # Optional: faster loop for these scheduling-bound checks.
+    uvloop = None
+
+if __package__ in (None, ""):
+    # Run directly as a script; pytest and `python -m tests.<name>` already see the repo root.
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import models.models as model_module
 
 
 class _FakeRouterModel:
     sequence: list[dict[str, Any]] = []
-    screen_context_payload: dict[str, Any] = {}
+    screen_context_payload: Mapping[str, Any] = MappingProxyType({})
     screen_context_calls: int = 0
+    screen_context_focuses: list[str] = []
 
     def __init__(self, clovis_model: str, rapid_response_model: str):
-        self._idx = 0
+        # Each instance consumes its own copy of the scripted routes.
+        self._routes = deque(self.sequence)
 
-    async def route_request(self, prompt: str) -> dict[str, Any]:
-        if self._idx >= len(self.sequence):
+    async def route_request(self, prompt: str, cache_scope=None) -> dict[str, Any]:
+        if not self._routes:
             return {"agent": "direct", "response_text": "done"}
-        value = self.sequence[self._idx]
-        self._idx += 1
-        return value
-
-    async def generate_screen_context(self, user_request: str, image=None, focus: str = "") -> dict[str, Any]:
-        _FakeRouterModel.screen_context_calls += 1
-        payload = dict(_FakeRouterModel.screen_context_payload)
-        if "recommended_task" not in payload:
-            payload["recommended_task"] = user_request
-        if "summary" not in payload:
-            payload["summary"] = "Screen context captured"
-        if "recommended_agent" not in payload:
-            payload["recommended_agent"] = "cua_cli"
-        return payload
+        return self._routes.popleft()
+
+    async def generate_screen_context(self, user_request: str, image=None, focus: str = "") -> Mapping[str, Any]:
+        type(self).screen_context_calls += 1
+        self.screen_context_focuses.append(focus)
+        # Defaults sit behind the read-only template; the template itself is never copied.
+        defaults = {
+            "recommended_task": user_request,
+            "summary": "Screen context captured",
+            "recommended_agent": "cua_cli",
+        }
+        return ChainMap(self.screen_context_payload, defaults)
 
 
-async def test_chains_multiple_agents_then_finishes() -> None:
-    original_model_cls = model_module.GeminiModel
-    original_run_step = model_module._run_routed_agent_step
-    original_direct_response = model_module.ROUTER_TOOL_MAP.get("direct_response")
+def _fake_router_model(
+    sequence: list[dict[str, Any]],
+    screen_context_payload: Optional[dict[str, Any]] = None,
+) -> type[_FakeRouterModel]:
+    """Build a fake router class whose script and counters belong to one test."""
+    return type(
+        "_ScriptedRouterModel",
+        (_FakeRouterModel,),
+        {
+            "sequence": sequence,
+            "screen_context_payload": MappingProxyType(dict(screen_context_payload or {})),
+            "screen_context_calls": 0,
+            "screen_context_focuses": [],
+        },
+    )
+
 
+@contextlib.contextmanager
+def _call_overrides(**overrides: Any):
+    """Swap call_gemini collaborators for the current task only."""
+    # Never touch the real screen: checks that do not care get an empty screenshot.
+    overrides.setdefault("get_stored_screenshot", lambda: None)
+    token = model_module.CALL_GEMINI_OVERRIDES.set(overrides)
+    try:
+        yield
+    finally:
+        model_module.CALL_GEMINI_OVERRIDES.reset(token)
+
+
+async def test_chains_multiple_agents_then_finishes() -> None:
     executed_agents: list[str] = []
     direct_messages: list[str] = []
 
@@ -65,34 +100,25 @@ async def test_chains_multiple_agents_then_finishes() -> None:
     def _fake_direct_response(**kwargs):
         direct_messages.append(str(kwargs.get("text", "")))
 
-    _FakeRouterModel.sequence = [
+    router_model = _fake_router_model([
         {"agent": "cua_vision", "task": "inspect screen for repo url"},
         {"agent": "cua_cli", "task": "clone repo locally"},
         {"agent": "browser", "task": "open localhost:3000"},
         {"agent": "direct", "response_text": "All done"},
-    ]
+    ])
 
-    model_module._RAPID_CONVERSATION_HISTORY.clear()
-    model_module.GeminiModel = _FakeRouterModel
-    model_module._run_routed_agent_step = _fake_run_step
-    model_module.ROUTER_TOOL_MAP["direct_response"] = _fake_direct_response
-    try:
+    with _call_overrides(
+        GeminiModel=router_model,
+        run_routed_agent_step=_fake_run_step,
+        direct_response=_fake_direct_response,
+    ):
         await model_module.call_gemini("clone this repo and open locally", "rapid", "clovis")
-        assert executed_agents == ["cua_vision", "cua_cli", "browser"], executed_agents
-        assert direct_messages, "Expected final direct response"
-        assert direct_messages[-1] == "All done", direct_messages
-    finally:
-        model_module.GeminiModel = original_model_cls
-        model_module._run_routed_agent_step = original_run_step
-        if original_direct_response is not None:
-            model_module.ROUTER_TOOL_MAP["direct_response"] = original_direct_response
+    assert executed_agents == ["cua_vision", "cua_cli", "browser"], executed_agents
+    assert direct_messages, "Expected final direct response"
+    assert direct_messages[-1] == "All done", direct_messages
 
 
 async def test_stops_on_repeated_step_loop() -> None:
-    original_model_cls = model_module.GeminiModel
-    original_run_step = model_module._run_routed_agent_step
-    original_direct_response = model_module.ROUTER_TOOL_MAP.get("direct_response")
-
     executed_agents: list[str] = []
     direct_messages: list[str] = []
 
@@ -110,60 +136,45 @@ async def test_stops_on_repeated_step_loop() -> None:
     def _fake_direct_response(**kwargs):
         direct_messages.append(str(kwargs.get("text", "")))
 
-    _FakeRouterModel.sequence = [
+    router_model = _fake_router_model([
         {"agent": "cua_cli", "task": "clone repo"},
         {"agent": "cua_cli", "task": "clone repo"},
         {"agent": "cua_cli", "task": "clone repo"},
-    ]
+    ])
 
-    model_module._RAPID_CONVERSATION_HISTORY.clear()
-    model_module.GeminiModel = _FakeRouterModel
-    model_module._run_routed_agent_step = _fake_run_step
-    model_module.ROUTER_TOOL_MAP["direct_response"] = _fake_direct_response
-    try:
+    with _call_overrides(
+        GeminiModel=router_model,
+        run_routed_agent_step=_fake_run_step,
+        direct_response=_fake_direct_response,
+    ):
         await model_module.call_gemini("clone this repo and open locally", "rapid", "clovis")
-        assert executed_agents == ["cua_cli", "cua_cli"], executed_agents
-        assert direct_messages, "Expected repeat-loop stop message"
-        assert "kept repeating" in direct_messages[-1].lower(), direct_messages[-1]
-    finally:
-        model_module.GeminiModel = original_model_cls
-        model_module._run_routed_agent_step = original_run_step
-        if original_direct_response is not None:
-            model_module.ROUTER_TOOL_MAP["direct_response"] = original_direct_response
+    assert executed_agents == ["cua_cli", "cua_cli"], executed_agents
+    assert direct_messages, "Expected repeat-loop stop message"
+    assert "kept repeating" in direct_messages[-1].lower(), direct_messages[-1]
 
 
 async def test_invalid_route_result_falls_back_to_direct() -> None:
-    original_model_cls = model_module.GeminiModel
-    original_direct_response = model_module.ROUTER_TOOL_MAP.get("direct_response")
-
     direct_messages: list[str] = []
 
     class _InvalidRouterModel(_FakeRouterModel):
-        async def route_request(self, prompt: str):
+        async def route_request(self, prompt: str, cache_scope=None):
             return None
 
     def _fake_direct_response(**kwargs):
         direct_messages.append(str(kwargs.get("text", "")))
 
     model_module._RAPID_CONVERSATION_HISTORY.clear()
-    model_module.GeminiModel = _InvalidRouterModel
-    model_module.ROUTER_TOOL_MAP["direct_response"] = _fake_direct_response
-    try:
+    with _call_overrides(
+        GeminiModel=_InvalidRouterModel,
+        direct_response=_fake_direct_response,
+    ):
         await model_module.call_gemini("open localhost 3000", "rapid", "clovis")
-        history_entries = list(model_module._RAPID_CONVERSATION_HISTORY)
-        assert history_entries, "Expected rapid history entry after fallback"
-        assert any("invalid response shape" in str(entry.get("text", "")).lower() for entry in history_entries), history_entries
-    finally:
-        model_module.GeminiModel = original_model_cls
-        if original_direct_response is not None:
-            model_module.ROUTER_TOOL_MAP["direct_response"] = original_direct_response
+    history_entries = list(model_module._RAPID_CONVERSATION_HISTORY)
+    assert history_entries, "Expected rapid history entry after fallback"
+    assert any("invalid response shape" in str(entry.get("text", "")).lower() for entry in history_entries), history_entries
 
 
 async def test_direct_response_repeat_artifact_is_sanitized() -> None:
-    original_model_cls = model_module.GeminiModel
-    original_run_step = model_module._run_routed_agent_step
-    original_direct_response = model_module.ROUTER_TOOL_MAP.get("direct_response")
-
     direct_messages: list[str] = []
 
     async def _fake_run_step(model, routing_result, clovis_model):
@@ -179,7 +190,7 @@ async def test_direct_response_repeat_artifact_is_sanitized() -> None:
     def _fake_direct_response(**kwargs):
         direct_messages.append(str(kwargs.get("text", "")))
 
-    _FakeRouterModel.sequence = [
+    router_model = _fake_router_model([
         {"agent": "cua_cli", "task": "Create folder hw"},
         {"agent": "cua_cli", "task": "Move cs 173 hw into hw"},
         {
@@ -189,35 +200,25 @@ async def test_direct_response_repeat_artifact_is_sanitized() -> None:
                 "in the history. Is there anything else I can help you with now?"
             ),
         },
-    ]
+    ])
 
-    model_module._RAPID_CONVERSATION_HISTORY.clear()
-    model_module.GeminiModel = _FakeRouterModel
-    model_module._run_routed_agent_step = _fake_run_step
-    model_module.ROUTER_TOOL_MAP["direct_response"] = _fake_direct_response
-    try:
+    with _call_overrides(
+        GeminiModel=router_model,
+        run_routed_agent_step=_fake_run_step,
+        direct_response=_fake_direct_response,
+    ):
         await model_module.call_gemini(
             "create a folder hw on desktop and move cs 173 hw into it",
             "rapid",
             "clovis",
         )
-        assert direct_messages, "Expected sanitized final direct response"
-        lowered = direct_messages[-1].lower()
-        assert "repeat the exact same task" not in lowered, direct_messages[-1]
-        assert lowered.startswith("task completed"), direct_messages[-1]
-    finally:
-        model_module.GeminiModel = original_model_cls
-        model_module._run_routed_agent_step = original_run_step
-        if original_direct_response is not None:
-            model_module.ROUTER_TOOL_MAP["direct_response"] = original_direct_response
+    assert direct_messages, "Expected sanitized final direct response"
+    lowered = direct_messages[-1].lower()
+    assert "repeat the exact same task" not in lowered, direct_messages[-1]
+    assert lowered.startswith("task completed"), direct_messages[-1]
 
 
 async def test_screen_context_then_actionable_agent() -> None:
-    original_model_cls = model_module.GeminiModel
-    original_run_step = model_module._run_routed_agent_step
-    original_direct_response = model_module.ROUTER_TOOL_MAP.get("direct_response")
-    original_get_stored_screenshot = model_module.get_stored_screenshot
-
     executed_agents: list[str] = []
     direct_messages: list[str] = []
 
@@ -235,51 +236,159 @@ async def test_screen_context_then_actionable_agent() -> None:
     def _fake_direct_response(**kwargs):
         direct_messages.append(str(kwargs.get("text", "")))
 
-    _FakeRouterModel.sequence = [
-        {"agent": "screen_context", "task": "clone this repository for me and open it up on localhost", "focus": "extract github repo url"},
-        {"agent": "cua_cli", "task": "git clone <repo-url> && run locally"},
-        {"agent": "direct", "response_text": "done"},
-    ]
-    _FakeRouterModel.screen_context_calls = 0
-    _FakeRouterModel.screen_context_payload = {
-        "summary": "GitHub repo page is visible.",
-        "repo_url": "https://github.com/example/repo",
-        "recommended_agent": "cua_cli",
-        "recommended_task": "Clone the repo and start the local server.",
-        "hints": "Repo URL visible in address bar.",
-    }
-
-    model_module._RAPID_CONVERSATION_HISTORY.clear()
-    model_module.GeminiModel = _FakeRouterModel
-    model_module._run_routed_agent_step = _fake_run_step
-    model_module.ROUTER_TOOL_MAP["direct_response"] = _fake_direct_response
-    model_module.get_stored_screenshot = lambda: None
-    try:
+    router_model = _fake_router_model(
+        [
+            {"agent": "screen_context", "task": "clone this repository for me and open it up on localhost", "focus": "extract github repo url"},
+            {"agent": "cua_cli", "task": "git clone <repo-url> && run locally"},
+            {"agent": "direct", "response_text": "done"},
+        ],
+        screen_context_payload={
+            "summary": "GitHub repo page is visible.",
+            "repo_url": "https://github.com/example/repo",
+            "recommended_agent": "cua_cli",
+            "recommended_task": "Clone the repo and start the local server.",
+            "hints": "Repo URL visible in address bar.",
+        },
+    )
+
+    with _call_overrides(
+        GeminiModel=router_model,
+        run_routed_agent_step=_fake_run_step,
+        direct_response=_fake_direct_response,
+        get_stored_screenshot=lambda: None,
+    ):
         await model_module.call_gemini(
             "clone this repository for me and open it up on localhost",
             "rapid",
             "clovis",
         )
-        assert _FakeRouterModel.screen_context_calls == 1, _FakeRouterModel.screen_context_calls
-        assert executed_agents == ["cua_cli"], executed_agents
-        assert direct_messages, "Expected final direct response"
-        assert direct_messages[-1] == "done", direct_messages
-    finally:
-        model_module.GeminiModel = original_model_cls
-        model_module._run_routed_agent_step = original_run_step
-        model_module.get_stored_screenshot = original_get_stored_screenshot
-        if original_direct_response is not None:
-            model_module.ROUTER_TOOL_MAP["direct_response"] = original_direct_response
+    # "this" starts a speculative unfocused call; the router's focus must still reach the judge.
+    assert router_model.screen_context_focuses[-1] == "extract github repo url", router_model.screen_context_focuses
+    assert executed_agents == ["cua_cli"], executed_agents
+    assert direct_messages, "Expected final direct response"
+    assert direct_messages[-1] == "done", direct_messages
+
+
+async def test_speculative_screen_context_reused_when_route_matches() -> None:
+    direct_messages: list[str] = []
+
+    def _fake_direct_response(**kwargs):
+        direct_messages.append(str(kwargs.get("text", "")))
+
+    prompt = "what does this error mean"
+    router_model = _fake_router_model([
+        {"agent": "screen_context", "task": prompt, "focus": ""},
+        {"agent": "direct", "response_text": "explained"},
+    ])
+
+    with _call_overrides(
+        GeminiModel=router_model,
+        direct_response=_fake_direct_response,
+        get_stored_screenshot=lambda: None,
+    ):
+        await model_module.call_gemini(prompt, "rapid", "clovis")
+    assert router_model.screen_context_calls == 1, router_model.screen_context_calls
+    assert direct_messages[-1] == "explained", direct_messages
+
+
+async def test_fast_route_skips_router() -> None:
+    direct_messages: list[str] = []
+    router_calls: list[str] = []
+
+    class _CountingRouterModel(_FakeRouterModel):
+        async def route_request(self, prompt: str, cache_scope=None):
+            router_calls.append(prompt)
+            return {"agent": "direct", "response_text": "routed"}
+
+    def _fake_direct_response(**kwargs):
+        direct_messages.append(str(kwargs.get("text", "")))
+
+    with _call_overrides(
+        GeminiModel=_CountingRouterModel,
+        direct_response=_fake_direct_response,
+    ):
+        await model_module.call_gemini("(3 + 4) * 2", "rapid", "clovis")
+        await model_module.call_gemini("what is 12 - 5?", "rapid", "clovis")
+        assert not router_calls, router_calls
+        assert len(direct_messages) == 2, direct_messages
+        assert direct_messages[0].endswith("= 14"), direct_messages
+        assert direct_messages[1] == "12 - 5 = 7", direct_messages
+
+        # Hyphenated and slashed numbers are not subtraction/division without an explicit cue.
+        negatives = ("555-1234", "1990-2000", "12/25/2024", "3/4", "what is 2 + 2 in binary")
+        for prompt in negatives:
+            await model_module.call_gemini(prompt, "rapid", "clovis")
+        assert len(router_calls) == len(negatives), router_calls
+
+    assert model_module._fast_route("what is 3/4")["response_text"] == "3/4 = 0.75"
+
+    # Greetings are canned only when no personality is configured.
+    greeting_route = model_module._fast_route("hello!")
+    assert (greeting_route is None) == bool(model_module._get_personality_section()), greeting_route
+
+
+async def test_route_cache_keeps_conversations_apart() -> None:
+    router_prompts: list[str] = []
+    executed_tasks: list[str] = []
+
+    async def _fake_generate_content(model, contents, config):
+        router_prompts.append(contents[0])
+        task = "Delete temp files" if "Delete temp files?" in contents[0] else "Open YouTube"
+        call = SimpleNamespace(name="invoke_cua_cli", args={"task": task})
+        part = SimpleNamespace(function_call=call)
+        return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+    class _FakeClientRouterModel(model_module.GeminiModel):
+        # Real routing and route cache, fake Gemini client.
+        def __init__(self, clovis_model: str, rapid_response_model: str):
+            self.client = SimpleNamespace(
+                aio=SimpleNamespace(models=SimpleNamespace(generate_content=_fake_generate_content))
+            )
+            self.rapid_response_model = rapid_response_model
+            self.router_config = None
+
+    async def _fake_run_step(model, routing_result, clovis_model):
+        executed_tasks.append(routing_result.get("task", ""))
+        # Failing the step ends the chain after one router call.
+        return {"agent": "cua_cli", "task": "", "success": False, "message": "stop", "source": "rapid"}
+
+    async def _no_model_name(name: str) -> None:
+        return None
+
+    with (
+        patch.object(model_module, "set_model_name", _no_model_name),
+        _call_overrides(
+            GeminiModel=_FakeClientRouterModel,
+            run_routed_agent_step=_fake_run_step,
+            direct_response=lambda **kwargs: None,
+            get_stored_screenshot=lambda: None,
+        ),
+    ):
+        for question in ("Open YouTube?", "Delete temp files?"):
+            model_module._RAPID_CONVERSATION_HISTORY.clear()
+            model_module._append_rapid_history("assistant", question, "rapid")
+            await model_module.call_gemini("yes", "rapid-cache-check", "clovis")
+    model_module._RAPID_CONVERSATION_HISTORY.clear()
+    # Same prompt, different history: the second "yes" must not reuse the first route.
+    assert len(router_prompts) == 2, router_prompts
+    assert executed_tasks == ["Open YouTube", "Delete temp files"], executed_tasks
 
 
 async def run_checks() -> None:
-    await test_chains_multiple_agents_then_finishes()
-    await test_stops_on_repeated_step_loop()
+    # Each check installs its fakes through a task-local override, so they can share the loop.
+    await asyncio.gather(
+        test_chains_multiple_agents_then_finishes(),
+        test_stops_on_repeated_step_loop(),
+        test_direct_response_repeat_artifact_is_sanitized(),
+        test_screen_context_then_actionable_agent(),
+        test_speculative_screen_context_reused_when_route_matches(),
+        test_fast_route_skips_router(),
+    )
+    # Rapid conversation history is process-wide, so the check that inspects it runs alone.
     await test_invalid_route_result_falls_back_to_direct()
-    await test_direct_response_repeat_artifact_is_sanitized()
-    await test_screen_context_then_actionable_agent()
+    await test_route_cache_keeps_conversations_apart()
 
 
 if __name__ == "__main__":
-    asyncio.run(run_checks())
+    (uvloop.run if uvloop else asyncio.run)(run_checks())
     print("[test_router_chaining] All checks passed.")
@@ -6,23 +6,51 @@ Does NOT call the actual LLM - just demonstrates the status bubble UI flow.
 
 Usage:
     python tests/test_status_bubble_browser.py
+    STATUS_BUBBLE_DELAY=0 python tests/test_status_bubble_browser.py  # no pacing
 """
 
 import asyncio
 import os
 import sys
 
-ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-sys.path.insert(0, ROOT_DIR)
+if __package__ in (None, ""):
+    # Run directly as a script; pytest and `python -m tests.<name>` already see the repo root.
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from core.settings import set_host_and_port
 from ui.server import VisualizationServer
 from ui.visualization_api.status_bubble import (
     show_status_bubble,
     update_status_bubble,
+    update_status_bubble_batch,
     hide_status_bubble,
 )
 
+# Seconds between simulated status updates; set STATUS_BUBBLE_DELAY=0 to skip pacing.
+_STATUS_DELAY = float(os.environ.get("STATUS_BUBBLE_DELAY", "1.0"))
+
+
+# Built once per process; payloads only reference them and never mutate them.
+_DARK_THEME = {
+    "statusBg": "rgba(4, 5, 7, 0.96)",
+    "statusBorder": "rgba(255, 255, 255, 0.06)",
+    "statusText": "rgba(242, 245, 248, 0.96)",
+    "statusShimmer": "rgba(160, 200, 255, 0.6)",
+    "statusCheck": "rgba(130, 200, 130, 0.9)",
+}
+_LIGHT_THEME = {
+    "statusBg": "rgba(245, 248, 252, 0.96)",
+    "statusBorder": "rgba(15, 20, 30, 0.1)",
+    "statusText": "rgba(15, 20, 30, 0.94)",
+    "statusShimmer": "rgba(60, 120, 220, 0.55)",
+    "statusCheck": "rgba(60, 120, 220, 0.9)",
+}
+
+
+async def _pace():
+    if _STATUS_DELAY > 0:
+        await asyncio.sleep(_STATUS_DELAY)
+
 
 async def simulate_browser_agent():
     """
@@ -41,29 +69,16 @@ async def simulate_browser_agent():
         "Task complete",
     ]
 
-    dark_theme = {
-        "statusBg": "rgba(4, 5, 7, 0.96)",
-        "statusBorder": "rgba(255, 255, 255, 0.06)",
-        "statusText": "rgba(242, 245, 248, 0.96)",
-        "statusShimmer": "rgba(160, 200, 255, 0.6)",
-        "statusCheck": "rgba(130, 200, 130, 0.9)",
-    }
-    light_theme = {
-        "statusBg": "rgba(245, 248, 252, 0.96)",
-        "statusBorder": "rgba(15, 20, 30, 0.1)",
-        "statusText": "rgba(15, 20, 30, 0.94)",
-        "statusShimmer": "rgba(60, 120, 220, 0.55)",
-        "statusCheck": "rgba(60, 120, 220, 0.9)",
-    }
-
-    await show_status_bubble(status_messages[0], theme=dark_theme)
-    await asyncio.sleep(1.0)
-    await update_status_bubble(status_messages[1], theme=light_theme)
-    await asyncio.sleep(1.0)
-
-    for msg in status_messages[2:]:
-        await update_status_bubble(msg)
-        await asyncio.sleep(1.0)
+    await show_status_bubble(status_messages[0], theme=_DARK_THEME)
+    await _pace()
+    await update_status_bubble(status_messages[1], theme=_LIGHT_THEME)
+    await _pace()
+
+    # The renderer paces the rest itself, so they go out as a single message.
+    remaining = status_messages[2:]
+    await update_status_bubble_batch(remaining, interval_ms=int(_STATUS_DELAY * 1000))
+    if _STATUS_DELAY > 0:
+        await asyncio.sleep(len(remaining) * _STATUS_DELAY)
 
     # Hide after showing "Task complete" briefly
     await hide_status_bubble(delay=1000)
@@ -84,7 +99,7 @@ async def run_test():
     print("[test_status_bubble_browser] Simulation complete!")
 
     # Keep server running for a moment to see the final state
-    await asyncio.sleep(2)
+    await asyncio.sleep(2 * _STATUS_DELAY)
     print("[test_status_bubble_browser] Test finished.")
 
 
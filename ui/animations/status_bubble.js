@@ -19,9 +19,13 @@
   let currentSource = 'unknown';
   let finalSource = 'unknown';
   let currentTheme = null;
+  let batchTimeout = null;
+  let batchQueue = [];
 
   const DEFAULT_DONE_TEXT = 'Task done';
   const DEFAULT_DONE_DELAY = 2000;
+  const DEFAULT_BATCH_INTERVAL = 1000;
+  const BATCH_RETRY_DELAY = 50;
   const normalizeSource = (source) =>
     (typeof source === 'string' && source.trim()) ? source.trim() : 'unknown';
   const logStatusText = (channel, text, source = currentSource) => {
@@ -66,6 +70,11 @@
       clearTimeout(completionTimeout);
       completionTimeout = null;
     }
+    if (batchTimeout) {
+      clearTimeout(batchTimeout);
+      batchTimeout = null;
+    }
+    batchQueue = [];
   };
 
   const resetFinalState = () => {
@@ -175,6 +184,53 @@
     }, 500);
   };
 
+  /**
+   * Play back a queued sequence of status updates received in one message.
+   * Each update waits for the previous text transition to finish.
+   * @param {string[]} messages - Status texts to display, in order
+   * @param {object} options - Optional interval, theme and source
+   */
+  window.updateStatusBubbleBatch = function(messages = [], options = {}) {
+    const intervalMs = Number.isFinite(options.intervalMs) ? options.intervalMs : DEFAULT_BATCH_INTERVAL;
+    if (batchTimeout) {
+      clearTimeout(batchTimeout);
+      batchTimeout = null;
+    }
+    const queue = messages.filter((message) => typeof message === 'string' && message);
+    if (options.source !== null && options.source !== undefined) {
+      currentSource = normalizeSource(options.source);
+    }
+    applyTheme(options.theme);
+
+    // Showing a hidden bubble runs clearTimers(), which empties batchQueue, so the
+    // first message is shown before the queue is installed.
+    let shownFirst = false;
+    if (queue.length && !statusBubble.classList.contains('status-bubble--visible')) {
+      window.showStatusBubble(queue.shift(), options.theme, currentSource);
+      shownFirst = true;
+    }
+    batchQueue = queue;
+
+    const runStep = () => {
+      batchTimeout = null;
+      if (!batchQueue.length) return;
+      if (isTransitioning) {
+        batchTimeout = setTimeout(runStep, BATCH_RETRY_DELAY);
+        return;
+      }
+      window.updateStatusBubble(batchQueue.shift());
+      if (batchQueue.length) {
+        batchTimeout = setTimeout(runStep, Math.max(0, intervalMs));
+      }
+    };
+
+    if (!shownFirst) {
+      runStep();
+    } else if (batchQueue.length) {
+      batchTimeout = setTimeout(runStep, Math.max(0, intervalMs));
+    }
+  };
+
   /**
    * Complete the status bubble flow with delayed expansion + final response text.
    * @param {string} responseText - Final model response to display in expanded bubble
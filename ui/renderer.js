@@ -608,6 +608,7 @@ window.overlayShowDirectResponse = function(text, source = 'unknown', theme = nu
 console.log('[renderer] boot', { width: window.innerWidth, height: window.innerHeight });
 
 let socket;
+const FRAME_ACK_COMMANDS = new Set(['draw_box', 'draw_dot', 'draw_text']);
 let reconnectDelay = 500;
 let reconnectTimer = null;
 let lastSocketLogTime = 0;
@@ -659,10 +660,14 @@ function scheduleReconnect() {
   reconnectDelay = Math.min(reconnectDelay * 1.5, 5000);
 }
 
+const socketTextDecoder = new TextDecoder();
+
 async function connectSocket() {
   const target = await getSocketTarget();
   const wsUrl = `ws://${target.host}:${target.port}`;
   socket = new WebSocket(wsUrl);
+  // The server sends pre-encoded UTF-8 JSON as binary frames.
+  socket.binaryType = 'arraybuffer';
   socket.addEventListener('open', () => {
     logSocketEvent(`[renderer] websocket open (${wsUrl})`);
     reconnectDelay = 500;
@@ -681,29 +686,41 @@ async function connectSocket() {
   });
 
   socket.addEventListener('message', (event) => {
-    let payload;
+    let message;
     try {
-      payload = JSON.parse(event.data);
+      const data = typeof event.data === 'string' ? event.data : socketTextDecoder.decode(event.data);
+      message = JSON.parse(data);
     } catch (error) {
       return;
     }
 
+    // The server coalesces bursts of commands into one {batch: [...]} frame.
+    const payloads = Array.isArray(message?.batch) ? message.batch : [message];
+    for (const payload of payloads) {
+      if (payload && typeof payload === 'object') {
+        handleSocketPayload(payload);
+      }
+    }
+  });
+}
+
+function handleSocketPayload(payload) {
   if (payload.command === 'draw_dot') {
-      console.log('[renderer] draw_dot', payload.id);
-      upsertDot({
-        id: payload.id,
-        x: payload.x,
-        y: payload.y,
-        radius: payload.radius || 6,
-        color: payload.color,
-        dotColor: payload.dotColor || '#ffffff',
-        ringColor: payload.ringColor || payload.color || '#66B7FF',
-        ringRadius: payload.ringRadius,
-        lineTo: payload.lineTo,
-        lineTargetTextId: payload.lineTargetTextId,
-        lineColor: payload.lineColor,
-        lineWidth: payload.lineWidth
-      });
+    console.log('[renderer] draw_dot', payload.id);
+    upsertDot({
+      id: payload.id,
+      x: payload.x,
+      y: payload.y,
+      radius: payload.radius || 6,
+      color: payload.color,
+      dotColor: payload.dotColor || '#ffffff',
+      ringColor: payload.ringColor || payload.color || '#66B7FF',
+      ringRadius: payload.ringRadius,
+      lineTo: payload.lineTo,
+      lineTargetTextId: payload.lineTargetTextId,
+      lineColor: payload.lineColor,
+      lineWidth: payload.lineWidth
+    });
   } else if (payload.command === 'draw_box') {
     upsertBox({
       id: payload.id,
@@ -716,89 +733,103 @@ async function connectSocket() {
       fill: payload.fill,
       opacity: payload.opacity
     });
-    } else if (payload.command === 'draw_text') {
-      if (typeof payload.text === 'string') {
-        const source = payload.source || 'unknown';
-        console.log(`[renderer][ui_text][${source}][draw_text][${payload.id || 'unknown'}] ${payload.text}`);
-      }
-      upsertText({
-        id: payload.id,
-        x: payload.x,
-        y: payload.y,
-        text: payload.text,
-        color: payload.color,
-        fontSize: payload.fontSize,
-        fontFamily: payload.fontFamily,
-        align: payload.align,
-        baseline: payload.baseline,
-        theme: payload.theme
-      });
-    } else if (payload.command === 'remove_dot') {
-      removeDot(payload.id);
-    } else if (payload.command === 'remove_box') {
-      removeBox(payload.id);
-    } else if (payload.command === 'remove_text') {
+  } else if (payload.command === 'draw_text') {
+    if (typeof payload.text === 'string') {
+      const source = payload.source || 'unknown';
+      console.log(`[renderer][ui_text][${source}][draw_text][${payload.id || 'unknown'}] ${payload.text}`);
+    }
+    upsertText({
+      id: payload.id,
+      x: payload.x,
+      y: payload.y,
+      text: payload.text,
+      color: payload.color,
+      fontSize: payload.fontSize,
+      fontFamily: payload.fontFamily,
+      align: payload.align,
+      baseline: payload.baseline,
+      theme: payload.theme
+    });
+  } else if (payload.command === 'remove_dot') {
+    removeDot(payload.id);
+  } else if (payload.command === 'remove_box') {
+    removeBox(payload.id);
+  } else if (payload.command === 'remove_text') {
+    removeText(payload.id);
+  } else if (payload.command === 'overlay_hide') {
+    if (window.overlayHideCommandOverlay) {
+      window.overlayHideCommandOverlay();
+    }
+    if (payload.id) {
       removeText(payload.id);
-    } else if (payload.command === 'overlay_hide') {
-      if (window.overlayHideCommandOverlay) {
-        window.overlayHideCommandOverlay();
-      }
-      if (payload.id) {
-        removeText(payload.id);
-      }
-    } else if (payload.command === 'show_command_overlay') {
-      if (window.overlayShowCommandOverlay) {
-        window.overlayShowCommandOverlay();
-      }
-    } else if (payload.command === 'clear') {
-      clearAll();
-    } else if (payload.command === 'set_background') {
-      const value = typeof payload.color === 'string' ? payload.color.trim() : '';
-      canvasBackgroundColor = value || null;
-      drawAll();
-    } else if (payload.command === 'set_model_name') {
-      if (payload.name) {
-        overlayModelName = payload.name;
-      }
-    } else if (payload.command === 'show_status_bubble') {
-      if (window.showStatusBubble) {
-        window.showStatusBubble(payload.text || 'Working...', payload.theme, payload.source);
-      }
-    } else if (payload.command === 'update_status_bubble') {
-      if (window.updateStatusBubble) {
-        window.updateStatusBubble(payload.text || 'Working...', payload.theme, payload.source);
-      }
-    } else if (payload.command === 'complete_status_bubble') {
-      if (window.completeStatusBubble) {
-        window.completeStatusBubble(payload.responseText || payload.text || '', {
-          doneText: payload.doneText,
-          delayMs: payload.delayMs ?? payload.delay,
-          theme: payload.theme,
-          source: payload.source
-        });
-      }
-    } else if (payload.command === 'hide_status_bubble') {
-      if (window.hideStatusBubble) {
-        window.hideStatusBubble(payload.delay || 0);
-      }
-    } else if (payload.command === 'show_cursor_status') {
-      if (window.showCursorStatus) {
-        window.showCursorStatus(payload.text || 'Working...', payload.theme, payload.source);
-      }
-    } else if (payload.command === 'update_cursor_status') {
-      if (window.updateCursorStatus) {
-        window.updateCursorStatus(payload.text || 'Working...', payload.theme, payload.source);
-      }
-    } else if (payload.command === 'hide_cursor_status') {
-      if (window.hideCursorStatus) {
-        window.hideCursorStatus();
-      }
-    } else if (payload.command === 'set_cursor_status_position') {
-      if (window.setCursorStatusPosition) {
-        window.setCursorStatusPosition(payload.x || 0, payload.y || 0);
-      }
     }
-  });
+  } else if (payload.command === 'show_command_overlay') {
+    if (window.overlayShowCommandOverlay) {
+      window.overlayShowCommandOverlay();
+    }
+  } else if (payload.command === 'clear') {
+    clearAll();
+  } else if (payload.command === 'set_background') {
+    const value = typeof payload.color === 'string' ? payload.color.trim() : '';
+    canvasBackgroundColor = value || null;
+    drawAll();
+  } else if (payload.command === 'set_model_name') {
+    if (payload.name) {
+      overlayModelName = payload.name;
+    }
+  } else if (payload.command === 'show_status_bubble') {
+    if (window.showStatusBubble) {
+      window.showStatusBubble(payload.text || 'Working...', payload.theme, payload.source);
+    }
+  } else if (payload.command === 'update_status_bubble') {
+    if (window.updateStatusBubble) {
+      window.updateStatusBubble(payload.text || 'Working...', payload.theme, payload.source);
+    }
+  } else if (payload.command === 'update_status_bubble_batch') {
+    if (window.updateStatusBubbleBatch) {
+      window.updateStatusBubbleBatch(payload.messages || [], {
+        intervalMs: payload.intervalMs,
+        theme: payload.theme,
+        source: payload.source
+      });
+    }
+  } else if (payload.command === 'complete_status_bubble') {
+    if (window.completeStatusBubble) {
+      window.completeStatusBubble(payload.responseText || payload.text || '', {
+        doneText: payload.doneText,
+        delayMs: payload.delayMs ?? payload.delay,
+        theme: payload.theme,
+        source: payload.source
+      });
+    }
+  } else if (payload.command === 'hide_status_bubble') {
+    if (window.hideStatusBubble) {
+      window.hideStatusBubble(payload.delay || 0);
+    }
+  } else if (payload.command === 'show_cursor_status') {
+    if (window.showCursorStatus) {
+      window.showCursorStatus(payload.text || 'Working...', payload.theme, payload.source);
+    }
+  } else if (payload.command === 'update_cursor_status') {
+    if (window.updateCursorStatus) {
+      window.updateCursorStatus(payload.text || 'Working...', payload.theme, payload.source);
+    }
+  } else if (payload.command === 'hide_cursor_status') {
+    if (window.hideCursorStatus) {
+      window.hideCursorStatus();
+    }
+  } else if (payload.command === 'set_cursor_status_position') {
+    if (window.setCursorStatusPosition) {
+      window.setCursorStatusPosition(payload.x || 0, payload.y || 0);
+    }
+  }
+
+  // Acknowledge drawn elements the server asked about once their frame has been painted.
+  if (payload.ack && payload.id && FRAME_ACK_COMMANDS.has(payload.command)) {
+    requestAnimationFrame(() => {
+      sendMessage({ event: 'frame_committed', id: payload.id });
+    });
+  }
 }
 
 void connectSocket();
@@ -1,8 +1,11 @@
 import asyncio
 import json
 import time
+from collections import OrderedDict
+from functools import partial
 from typing import Optional, Tuple
 
+import numpy as np
 import websockets
 from websockets.exceptions import ConnectionClosed
 from core.settings import get_screen_size, set_screen_size
@@ -15,211 +18,368 @@ try:
     import pyautogui
 except Exception:
     pyautogui = None
+# orjson is an optional speedup for the per-message encode/decode; fall back to stdlib.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Rec. 709 luma weights used when averaging sampled pixels.
+_LUMINANCE_WEIGHTS = np.array([0.2126, 0.7152, 0.0722])
+# Compact UTF-8 JSON for everything sent to renderers.
+_json_encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+
+def _encode_message(payload) -> bytes:
+    # Sent as-is in binary frames; the renderer decodes them with TextDecoder.
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return _json_encode(payload).encode("utf-8")
+
+
+_decode_message = orjson.loads if orjson is not None else json.loads
+
+# Overlay palettes keyed by background brightness; built once and shared by every theme lookup.
+_LIGHT_ON_DARK_PALETTE = {
+    "mode": "light-on-dark",
+    "accent": "rgba(160, 200, 255, 0.85)",
+    "boxStroke": "rgba(102, 183, 255, 0.95)",
+    "text": "rgba(242, 245, 248, 0.96)",
+    "label": "rgba(255, 255, 255, 0.5)",
+    "thinking": "rgba(210, 215, 224, 0.85)",
+    "panelBg": "rgba(14, 14, 18, 0.9)",
+    "panelBorder": "rgba(255, 255, 255, 0.12)",
+    "meta": "rgba(255, 255, 255, 0.7)",
+    "divider": "rgba(255, 255, 255, 0.75)",
+    "shimmer": "rgba(255, 255, 255, 1)",
+    "statusBg": "rgba(4, 5, 7, 0.96)",
+    "statusBorder": "rgba(255, 255, 255, 0.06)",
+    "statusText": "rgba(242, 245, 248, 0.96)",
+    "statusShimmer": "rgba(160, 200, 255, 0.6)",
+    "statusCheck": "rgba(130, 200, 130, 0.9)",
+    "cursorBg": "rgba(5, 6, 8, 0.92)",
+    "cursorBorder": "rgba(255, 255, 255, 0.06)",
+    "cursorText": "rgba(242, 245, 248, 0.96)",
+    "cursorShimmer": "rgba(160, 200, 255, 0.6)",
+}
+_DARK_ON_LIGHT_PALETTE = {
+    "mode": "dark-on-light",
+    "accent": "rgba(55, 120, 220, 0.85)",
+    "boxStroke": "rgba(45, 123, 255, 0.95)",
+    "text": "rgba(15, 20, 30, 0.94)",
+    "label": "rgba(15, 20, 30, 0.55)",
+    "thinking": "rgba(35, 40, 55, 0.75)",
+    "panelBg": "rgba(248, 250, 252, 0.94)",
+    "panelBorder": "rgba(15, 20, 30, 0.14)",
+    "meta": "rgba(15, 20, 30, 0.6)",
+    "divider": "rgba(15, 20, 30, 0.5)",
+    "shimmer": "rgba(60, 120, 220, 0.85)",
+    "statusBg": "rgba(245, 248, 252, 0.96)",
+    "statusBorder": "rgba(15, 20, 30, 0.1)",
+    "statusText": "rgba(15, 20, 30, 0.94)",
+    "statusShimmer": "rgba(60, 120, 220, 0.55)",
+    "statusCheck": "rgba(60, 120, 220, 0.9)",
+    "cursorBg": "rgba(246, 249, 252, 0.94)",
+    "cursorBorder": "rgba(15, 20, 30, 0.1)",
+    "cursorText": "rgba(15, 20, 30, 0.94)",
+    "cursorShimmer": "rgba(60, 120, 220, 0.55)",
+}
 
 
 class VisualizationServer:
     DARK_LUMINANCE_THRESHOLD = 112
     INVERTED_PANEL_DARK_THRESHOLD = 45
     STATUS_INVERTED_PANEL_DARK_THRESHOLD = 132
-
-    def __init__(self, host="127.0.0.1", port=8765, on_overlay_input=None, on_capture_screenshot=None, on_stop_all=None):
+    # Bursts of draw/status/cursor commands reuse a theme sampled this recently.
+    THEME_CACHE_TTL_SECONDS = 0.5
+    THEME_CACHE_MAX_ENTRIES = 64
+    # Without a stored screenshot, only this window around a sample point is grabbed.
+    SAMPLE_WINDOW_RADIUS = 16
+    SEEN_OVERLAY_REQUEST_IDS_MAX = 1024
+    # Per-client outbound backlog. Send-only clients (the Python VisualizationClient)
+    # never read, so past this the oldest queued broadcasts are dropped.
+    CLIENT_QUEUE_MAX = 1024
+    # Acked frame ids nobody has waited for yet; oldest are dropped past this.
+    COMMITTED_FRAMES_MAX = 256
+    # Status/cursor text updates arriving within one frame collapse to the latest.
+    STATUS_DEBOUNCE_SECONDS = 0.016
+
+    def __init__(self, host="127.0.0.1", port=8765, on_overlay_input=None, on_capture_screenshot=None, on_stop_all=None, frame_acks=False):
         self.host = host
         self.port = port
         self.clients = set()
         self.boxes = {}
         self.texts = {}
         self.dots = {}
+        # Serialized copies of boxes/texts/dots, reused for broadcast and reconnect replay.
+        self._boxes_json = {}
+        self._texts_json = {}
+        self._dots_json = {}
         self._server = None
         self.on_overlay_input = on_overlay_input
         self.on_capture_screenshot = on_capture_screenshot
         self.on_stop_all = on_stop_all
         self._last_screenshot = None
         self._last_screenshot_rgb = None
+        self._rgb_array_cache = None
+        self._region_captures = {}
         self._last_capture_backend = "none"
+        self._imagegrab_black = False
         self._last_cursor_pos = (0, 0)
         self._last_dark_sample = False
         self._last_theme_log_ts = 0.0
         self._active_status_theme = None
-        self._seen_overlay_request_ids = {}
+        self._theme_cache = {}
+        # request id -> first-seen time, oldest first.
+        self._seen_overlay_request_ids = OrderedDict()
         self._last_overlay_text = ""
         self._last_overlay_ts = 0.0
+        # When set, draws ask the renderer to ack once painted (see wait_for_frame).
+        self.frame_acks = frame_acks
+        self._committed_frames = OrderedDict()
+        self._frame_waiters = {}
+        self._client_connected = asyncio.Event()
+        self._client_queues = {}
+        self._last_broadcast_message = None
+        self._pending_status = {}
+        self._status_flush_task = None
+        # Inbound command -> handler; anything else is treated as a renderer event.
+        self._command_handlers = {
+            "draw_box": self._on_draw_box,
+            "draw_dot": self._on_draw_dot,
+            "draw_text": self._on_draw_text,
+            "remove_box": partial(self._on_remove_element, self.boxes, self._boxes_json),
+            "remove_dot": partial(self._on_remove_element, self.dots, self._dots_json),
+            "remove_text": partial(self._on_remove_element, self.texts, self._texts_json),
+            "overlay_hide": self._broadcast,
+            "show_command_overlay": self._broadcast,
+            "set_model_name": self._broadcast,
+            "show_status_bubble": self._on_show_status_bubble,
+            "update_status_bubble": self._on_update_status_bubble,
+            "update_status_bubble_batch": self._on_status_bubble_followup,
+            "complete_status_bubble": self._on_status_bubble_followup,
+            "hide_status_bubble": self._on_hide_status_bubble,
+            "show_cursor_status": self._on_show_cursor_status,
+            "update_cursor_status": self._on_update_cursor_status,
+            "hide_cursor_status": self._broadcast,
+            "set_cursor_status_position": self._on_set_cursor_status_position,
+            "clear": self._on_clear,
+            "set_background": self._broadcast,
+        }
 
     def _store_screenshot(self, screenshot) -> None:
         self._last_screenshot = screenshot
+        # Converted to RGB on first use in _get_screenshot_rgb; draw-only flows never pay for it.
         self._last_screenshot_rgb = None
-        if screenshot is None:
-            return
+        self._region_captures.clear()
+        self._theme_cache.clear()
+
+    def _rgb_array(self, image_rgb) -> Optional[np.ndarray]:
+        """HxWx3 uint8 view of `image_rgb`, converted once per image."""
+        cached = self._rgb_array_cache
+        if cached is not None and cached[0] is image_rgb:
+            return cached[1]
         try:
-            self._last_screenshot_rgb = screenshot.convert("RGB")
+            array = np.asarray(image_rgb, dtype=np.uint8)
         except Exception:
-            self._last_screenshot_rgb = None
+            return None
+        if array.ndim != 3 or array.shape[2] < 3:
+            return None
+        array = array[..., :3]
+        self._rgb_array_cache = (image_rgb, array)
+        return array
 
     def _is_likely_invalid_capture(self, image_rgb) -> bool:
         if image_rgb is None:
             return True
-        width, height = image_rgb.size
+        array = self._rgb_array(image_rgb)
+        if array is None:
+            return True
+        height, width = array.shape[:2]
         if width <= 0 or height <= 0:
             return True
 
         # Sparse sampling: if everything is near-black, this is likely a bad capture path.
-        dark_like = 0
-        total = 0
-        for y in range(0, height, max(1, height // 6)):
-            for x in range(0, width, max(1, width // 6)):
-                try:
-                    r, g, b = image_rgb.getpixel((x, y))
-                except Exception:
-                    continue
-                total += 1
-                if r <= 4 and g <= 4 and b <= 4:
-                    dark_like += 1
-
-        if total == 0:
+        grid = array[::max(1, height // 6), ::max(1, width // 6)]
+        if grid.size == 0:
             return True
-        return (dark_like / total) >= 0.9
-
-    def _get_screenshot_rgb(self):
-        if self._last_screenshot_rgb is not None:
-            self._last_capture_backend = "cache"
-            return self._last_screenshot_rgb
-        if self._last_screenshot is not None:
-            self._store_screenshot(self._last_screenshot)
-            self._last_capture_backend = "cache"
-            return self._last_screenshot_rgb
+        dark_like = (grid <= 4).all(axis=-1)
+        return float(dark_like.mean()) >= 0.9
 
+    def _capture_screen(self, bbox: Optional[Tuple[int, int, int, int]]):
         screenshot_rgb = None
-        if ImageGrab is not None:
+        backend = "none"
+        # Region grabs skip ImageGrab once a full grab showed it returns black frames.
+        if ImageGrab is not None and not (bbox is not None and self._imagegrab_black and pyautogui is not None):
             try:
-                screenshot_rgb = ImageGrab.grab().convert("RGB")
-                self._last_capture_backend = "imagegrab"
+                screenshot_rgb = ImageGrab.grab(bbox=bbox).convert("RGB")
+                backend = "imagegrab"
             except Exception:
                 screenshot_rgb = None
 
         # Fall back when PIL capture is unavailable or likely invalid (e.g., all black).
-        if (screenshot_rgb is None or self._is_likely_invalid_capture(screenshot_rgb)) and pyautogui is not None:
+        # The all-black check is only meaningful for full grabs; a small sample window
+        # over dark content is legitimately dark.
+        invalid = screenshot_rgb is None
+        if not invalid and bbox is None:
+            self._imagegrab_black = invalid = self._is_likely_invalid_capture(screenshot_rgb)
+        if invalid and pyautogui is not None:
             try:
-                screenshot_rgb = pyautogui.screenshot().convert("RGB")
-                self._last_capture_backend = "pyautogui"
+                if bbox is None:
+                    screenshot_rgb = pyautogui.screenshot().convert("RGB")
+                else:
+                    left, top, right, bottom = bbox
+                    region = (left, top, right - left, bottom - top)
+                    screenshot_rgb = pyautogui.screenshot(region=region).convert("RGB")
+                backend = "pyautogui"
             except Exception:
                 pass
 
         if screenshot_rgb is None:
-            self._last_capture_backend = "none"
+            backend = "none"
+        return screenshot_rgb, backend
+
+    async def _get_screenshot_rgb(self, bbox: Optional[Tuple[int, int, int, int]] = None):
+        """Full screenshot, or just the `bbox` region (left, top, right, bottom) of it."""
+        if self._last_screenshot is not None and self._last_screenshot_rgb is None:
+            source = self._last_screenshot
+            try:
+                screenshot_rgb = await asyncio.to_thread(source.convert, "RGB")
+            except Exception:
+                screenshot_rgb = None
+            if self._last_screenshot is source:
+                self._last_screenshot_rgb = screenshot_rgb
+        if self._last_screenshot_rgb is not None:
+            self._last_capture_backend = "cache"
+            if bbox is None:
+                return self._last_screenshot_rgb
+            width, height = self._last_screenshot_rgb.size
+            left, top, right, bottom = bbox
+            left, top = min(left, width - 1), min(top, height - 1)
+            return self._last_screenshot_rgb.crop(
+                (left, top, max(min(right, width), left + 1), max(min(bottom, height), top + 1))
+            )
+        if bbox is not None and bbox in self._region_captures:
+            self._last_capture_backend = "cache"
+            return self._region_captures[bbox]
+
+        # Screen grabs block for tens to hundreds of ms; keep them off the event loop.
+        screenshot_rgb, self._last_capture_backend = await asyncio.to_thread(self._capture_screen, bbox)
+        if screenshot_rgb is None:
             return None
 
-        self._last_screenshot_rgb = screenshot_rgb
-        return self._last_screenshot_rgb
+        if bbox is None:
+            # A screenshot stored while the grab was running is newer; keep it.
+            if self._last_screenshot_rgb is None:
+                self._last_screenshot_rgb = screenshot_rgb
+        else:
+            if len(self._region_captures) >= self.THEME_CACHE_MAX_ENTRIES:
+                self._region_captures.clear()
+            self._region_captures[bbox] = screenshot_rgb
+        return screenshot_rgb
+
+    def _sample_bbox(self, x: int, y: int) -> Tuple[int, int, int, int]:
+        radius = self.SAMPLE_WINDOW_RADIUS
+        x, y = max(int(x), 0), max(int(y), 0)
+        width, height = get_screen_size()
+        if width and height:
+            x, y = min(x, width - 1), min(y, height - 1)
+        right, bottom = x + radius + 1, y + radius + 1
+        if width and height:
+            right, bottom = min(right, width), min(bottom, height)
+        return max(x - radius, 0), max(y - radius, 0), right, bottom
 
     def _get_palette(self, prefer_light_text: bool) -> dict:
-        if prefer_light_text:
-            return {
-                "mode": "light-on-dark",
-                "accent": "rgba(160, 200, 255, 0.85)",
-                "boxStroke": "rgba(102, 183, 255, 0.95)",
-                "text": "rgba(242, 245, 248, 0.96)",
-                "label": "rgba(255, 255, 255, 0.5)",
-                "thinking": "rgba(210, 215, 224, 0.85)",
-                "panelBg": "rgba(14, 14, 18, 0.9)",
-                "panelBorder": "rgba(255, 255, 255, 0.12)",
-                "meta": "rgba(255, 255, 255, 0.7)",
-                "divider": "rgba(255, 255, 255, 0.75)",
-                "shimmer": "rgba(255, 255, 255, 1)",
-                "statusBg": "rgba(4, 5, 7, 0.96)",
-                "statusBorder": "rgba(255, 255, 255, 0.06)",
-                "statusText": "rgba(242, 245, 248, 0.96)",
-                "statusShimmer": "rgba(160, 200, 255, 0.6)",
-                "statusCheck": "rgba(130, 200, 130, 0.9)",
-                "cursorBg": "rgba(5, 6, 8, 0.92)",
-                "cursorBorder": "rgba(255, 255, 255, 0.06)",
-                "cursorText": "rgba(242, 245, 248, 0.96)",
-                "cursorShimmer": "rgba(160, 200, 255, 0.6)",
-            }
-        return {
-            "mode": "dark-on-light",
-            "accent": "rgba(55, 120, 220, 0.85)",
-            "boxStroke": "rgba(45, 123, 255, 0.95)",
-            "text": "rgba(15, 20, 30, 0.94)",
-            "label": "rgba(15, 20, 30, 0.55)",
-            "thinking": "rgba(35, 40, 55, 0.75)",
-            "panelBg": "rgba(248, 250, 252, 0.94)",
-            "panelBorder": "rgba(15, 20, 30, 0.14)",
-            "meta": "rgba(15, 20, 30, 0.6)",
-            "divider": "rgba(15, 20, 30, 0.5)",
-            "shimmer": "rgba(60, 120, 220, 0.85)",
-            "statusBg": "rgba(245, 248, 252, 0.96)",
-            "statusBorder": "rgba(15, 20, 30, 0.1)",
-            "statusText": "rgba(15, 20, 30, 0.94)",
-            "statusShimmer": "rgba(60, 120, 220, 0.55)",
-            "statusCheck": "rgba(60, 120, 220, 0.9)",
-            "cursorBg": "rgba(246, 249, 252, 0.94)",
-            "cursorBorder": "rgba(15, 20, 30, 0.1)",
-            "cursorText": "rgba(15, 20, 30, 0.94)",
-            "cursorShimmer": "rgba(60, 120, 220, 0.55)",
-        }
-
-    def _is_dark_at(self, x: int, y: int, threshold: int = None) -> bool:
-        screenshot = self._get_screenshot_rgb()
+        # Shared constants: callers only read these or attach them to outgoing payloads.
+        return _LIGHT_ON_DARK_PALETTE if prefer_light_text else _DARK_ON_LIGHT_PALETTE
+
+    async def _is_dark_at(self, x: int, y: int, threshold: int = None) -> bool:
+        # Sample the stored screenshot when there is one; otherwise grab only a small window.
+        bbox = None
+        origin_x = origin_y = 0
+        if self._last_screenshot is None and self._last_screenshot_rgb is None:
+            bbox = self._sample_bbox(x, y)
+            origin_x, origin_y = bbox[0], bbox[1]
+        screenshot = await self._get_screenshot_rgb(bbox)
         if screenshot is None:
             return self._last_dark_sample
-        width, height = screenshot.size
+        array = self._rgb_array(screenshot)
+        # Conservative fallback if sampling failed.
+        if array is None:
+            return self._last_dark_sample
+        height, width = array.shape[:2]
         if width <= 0 or height <= 0:
             return self._last_dark_sample
-        px = min(max(int(x), 0), width - 1)
-        py = min(max(int(y), 0), height - 1)
+        px = min(max(int(x) - origin_x, 0), width - 1)
+        py = min(max(int(y) - origin_y, 0), height - 1)
 
-        # Average a local neighborhood for stability.
+        # Average a local neighborhood for stability; edge samples clamp to the border.
         radius = 12
         step = 4
-        luminance_sum = 0.0
-        sample_count = 0
-
-        for dy in range(-radius, radius + 1, step):
-            sy = min(max(py + dy, 0), height - 1)
-            for dx in range(-radius, radius + 1, step):
-                sx = min(max(px + dx, 0), width - 1)
-                try:
-                    r, g, b = screenshot.getpixel((sx, sy))
-                except Exception:
-                    continue
-
-                luminance_sum += (0.2126 * r) + (0.7152 * g) + (0.0722 * b)
-                sample_count += 1
+        offsets = np.arange(-radius, radius + 1, step)
+        ys = np.clip(py + offsets, 0, height - 1)
+        xs = np.clip(px + offsets, 0, width - 1)
+        neighborhood = array[np.ix_(ys, xs)]
 
-        # Conservative fallback if sampling failed.
-        if sample_count == 0:
-            return self._last_dark_sample
-
-        avg_luminance = luminance_sum / sample_count
+        avg_luminance = float((neighborhood @ _LUMINANCE_WEIGHTS).mean())
         active_threshold = threshold if threshold is not None else self.DARK_LUMINANCE_THRESHOLD
         is_dark = avg_luminance < active_threshold
         self._last_dark_sample = is_dark
         return is_dark
 
-    def _theme_for_point(self, x: int, y: int) -> dict:
-        prefer_light_text = self._is_dark_at(x, y)
-        return self._get_palette(prefer_light_text)
+    async def _cached_theme(self, key: tuple, compute) -> dict:
+        cached = self._theme_cache.get(key)
+        if cached is not None and (time.monotonic() - cached[0]) < self.THEME_CACHE_TTL_SECONDS:
+            return cached[1]
+        theme = await compute()
+        now = time.monotonic()
+        if len(self._theme_cache) >= self.THEME_CACHE_MAX_ENTRIES:
+            self._theme_cache = {
+                k: v for k, v in self._theme_cache.items()
+                if (now - v[0]) < self.THEME_CACHE_TTL_SECONDS
+            }
+        self._theme_cache[key] = (now, theme)
+        return theme
 
-    def _theme_for_text(self, x: int, y: int) -> dict:
-        prefer_light_text = self._is_dark_at(x, y, self.INVERTED_PANEL_DARK_THRESHOLD)
-        return self._get_palette(not prefer_light_text)
+    async def _palette_at(self, x: int, y: int, threshold: int = None, invert: bool = False) -> dict:
+        prefer_light_text = await self._is_dark_at(x, y, threshold)
+        return self._get_palette(prefer_light_text != invert)
+
+    async def _theme_for_point(self, x: int, y: int) -> dict:
+        return await self._cached_theme(
+            ("point", int(x), int(y)),
+            lambda: self._palette_at(x, y),
+        )
+
+    async def _theme_for_text(self, x: int, y: int) -> dict:
+        return await self._cached_theme(
+            ("text", int(x), int(y)),
+            lambda: self._palette_at(x, y, self.INVERTED_PANEL_DARK_THRESHOLD, invert=True),
+        )
 
-    def _theme_for_status(self) -> dict:
+    async def _theme_for_status(self) -> dict:
+        return await self._cached_theme(("status",), self._sample_status_theme)
+
+    async def _sample_status_theme(self) -> dict:
         width, height = get_screen_size()
         if not width or not height:
-            screenshot = self._get_screenshot_rgb()
+            screenshot = await self._get_screenshot_rgb()
             if screenshot:
                 width, height = screenshot.size
         x = int((width or 1920) / 2)
         y = 50
         # Invert for status bubble as well, but use a more lenient threshold
         # for the brighter top strip many desktops/windows have.
-        prefer_light_text = self._is_dark_at(x, y, self.STATUS_INVERTED_PANEL_DARK_THRESHOLD)
+        prefer_light_text = await self._is_dark_at(x, y, self.STATUS_INVERTED_PANEL_DARK_THRESHOLD)
         return self._get_palette(not prefer_light_text)
 
-    def _theme_for_cursor(self) -> dict:
+    async def _theme_for_cursor(self) -> dict:
         x, y = self._last_cursor_pos
-        prefer_light_text = self._is_dark_at(x, y, self.INVERTED_PANEL_DARK_THRESHOLD)
-        return self._get_palette(not prefer_light_text)
+        return await self._cached_theme(
+            ("cursor", int(x), int(y)),
+            lambda: self._palette_at(x, y, self.INVERTED_PANEL_DARK_THRESHOLD, invert=True),
+        )
 
     async def start(self):
         # Disable ping_interval since VisualizationClient (internal) only sends
@@ -238,179 +398,305 @@ class VisualizationServer:
         await asyncio.Future()
 
     async def wait_for_client(self):
-        while not self.clients:
-            await asyncio.sleep(0.05)
+        await self._client_connected.wait()
+
+    def _drop_client(self, websocket) -> None:
+        self.clients.discard(websocket)
+        self._client_queues.pop(websocket, None)
+        if not self.clients:
+            self._client_connected.clear()
+
+    async def wait_for_frame(self, frame_id: str, timeout: Optional[float] = None) -> bool:
+        """Wait until the renderer reports it has painted the element with `frame_id`.
+
+        Needs a server built with `frame_acks=True`. Returns False if `timeout`
+        elapses first. Each ack satisfies one wait and is then forgotten.
+        """
+        if self._committed_frames.pop(frame_id, None) is not None:
+            return True
+        event = self._frame_waiters.setdefault(frame_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            if self._frame_waiters.get(frame_id) is event:
+                self._frame_waiters.pop(frame_id, None)
+            return False
+        return True
+
+    def _forget_frame(self, frame_id) -> None:
+        self._committed_frames.pop(frame_id, None)
+
+    def _track_frame(self, payload: dict) -> None:
+        self._forget_frame(payload["id"])
+        if self.frame_acks:
+            payload["ack"] = True
+
+    def _commit_frame(self, frame_id) -> None:
+        if not frame_id:
+            return
+        event = self._frame_waiters.pop(frame_id, None)
+        if event is not None:
+            event.set()
+            return
+        committed = self._committed_frames
+        committed[frame_id] = True
+        committed.move_to_end(frame_id)
+        if len(committed) > self.COMMITTED_FRAMES_MAX:
+            committed.popitem(last=False)
+
+    @staticmethod
+    def _store_element(store: dict, serialized: dict, payload: dict) -> bytes:
+        message = _encode_message(payload)
+        store[payload["id"]] = payload
+        serialized[payload["id"]] = message
+        return message
+
+    async def _client_writer(self, websocket, queue: asyncio.Queue) -> None:
+        """Send queued messages, merging whatever piled up since the last send into one frame."""
+        try:
+            while True:
+                batch = [await queue.get()]
+                while True:
+                    try:
+                        batch.append(queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+                if len(batch) == 1:
+                    await websocket.send(batch[0])
+                else:
+                    await websocket.send(b'{"batch":[' + b",".join(batch) + b"]}")
+        except ConnectionClosed:
+            self._drop_client(websocket)
+
+    @staticmethod
+    async def _incoming_payloads(websocket):
+        """Decoded commands/events from `websocket`, unpacking `{"batch": [...]}` frames."""
+        async for message in websocket:
+            try:
+                payload = _decode_message(message)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(payload, dict):
+                continue
+            batch = payload.get("batch")
+            if isinstance(batch, list):
+                for item in batch:
+                    if isinstance(item, dict):
+                        yield item
+            else:
+                yield payload
 
     async def _handle_client(self, websocket):
+        queue = asyncio.Queue(maxsize=self.CLIENT_QUEUE_MAX)
+        self._client_queues[websocket] = queue
         self.clients.add(websocket)
+        self._client_connected.set()
+        # A fresh renderer has none of the earlier state, so nothing counts as a repeat.
+        self._last_broadcast_message = None
+        writer = None
         try:
-            for box in self.boxes.values():
-                await websocket.send(json.dumps(box))
-            for text in self.texts.values():
-                await websocket.send(json.dumps(text))
-            for dot in self.dots.values():
-                await websocket.send(json.dumps(dot))
-
-            async for message in websocket:
-                try:
-                    payload = json.loads(message)
-                except json.JSONDecodeError:
-                    continue
-
-                command = payload.get("command")
-                if command == "draw_box":
-                    if payload.get("autoContrast"):
-                        center_x = payload.get("x", 0) + (payload.get("width", 0) / 2)
-                        center_y = payload.get("y", 0) + (payload.get("height", 0) / 2)
-                        theme = self._theme_for_point(center_x, center_y)
-                        payload["stroke"] = theme.get("boxStroke") or theme.get("accent") or payload.get("stroke")
-                    self.boxes[payload["id"]] = payload
-                    await self._broadcast(payload)
-                elif command == "draw_dot":
-                    self.dots[payload["id"]] = payload
-                    await self._broadcast(payload)
-                elif command == "draw_text":
-                    theme = self._theme_for_text(payload.get("x", 0), payload.get("y", 0))
-                    payload["theme"] = theme
-                    payload["color"] = theme.get("accent")
-                    self.texts[payload["id"]] = payload
-                    await self._broadcast(payload)
-                elif command == "remove_box":
-                    self.boxes.pop(payload.get("id"), None)
-                    await self._broadcast(payload)
-                elif command == "remove_dot":
-                    self.dots.pop(payload.get("id"), None)
-                    await self._broadcast(payload)
-                elif command == "remove_text":
-                    self.texts.pop(payload.get("id"), None)
-                    await self._broadcast(payload)
-                elif command == "overlay_hide":
-                    await self._broadcast(payload)
-                elif command == "show_command_overlay":
-                    await self._broadcast(payload)
-                elif command == "set_model_name":
-                    await self._broadcast(payload)
-                elif command == "show_status_bubble":
-                    if "theme" in payload and payload.get("theme"):
-                        self._active_status_theme = payload["theme"]
-                    else:
-                        self._active_status_theme = self._theme_for_status()
-                        payload["theme"] = self._active_status_theme
-                    await self._broadcast(payload)
-                elif command == "update_status_bubble":
-                    if "theme" in payload and payload.get("theme"):
-                        self._active_status_theme = payload["theme"]
-                    elif self._active_status_theme is not None:
-                        payload["theme"] = self._active_status_theme
-                    else:
-                        self._active_status_theme = self._theme_for_status()
-                        payload["theme"] = self._active_status_theme
-                    await self._broadcast(payload)
-                elif command == "complete_status_bubble":
-                    if "theme" in payload and payload.get("theme"):
-                        self._active_status_theme = payload["theme"]
-                    elif self._active_status_theme is not None:
-                        payload["theme"] = self._active_status_theme
-                    else:
-                        self._active_status_theme = self._theme_for_status()
-                        payload["theme"] = self._active_status_theme
-                    await self._broadcast(payload)
-                elif command == "hide_status_bubble":
-                    self._active_status_theme = None
-                    await self._broadcast(payload)
-                elif command == "show_cursor_status":
-                    if "theme" not in payload:
-                        payload["theme"] = self._theme_for_cursor()
-                    await self._broadcast(payload)
-                elif command == "update_cursor_status":
-                    if "theme" not in payload:
-                        payload["theme"] = self._theme_for_cursor()
-                    await self._broadcast(payload)
-                elif command == "hide_cursor_status":
-                    await self._broadcast(payload)
-                elif command == "set_cursor_status_position":
-                    self._last_cursor_pos = (payload.get("x", 0), payload.get("y", 0))
-                    await self._broadcast(payload)
-                elif command == "clear":
-                    self.boxes.clear()
-                    self.texts.clear()
-                    self.dots.clear()
-                    self._active_status_theme = None
-                    await self._broadcast(payload)
-                elif command == "set_background":
-                    await self._broadcast(payload)
+            # Replay is sent before the writer starts; broadcasts meanwhile wait in the queue
+            # behind it. One frame, so the backlog cap never drops part of it.
+            replay = [
+                message
+                for cached in (self._boxes_json, self._texts_json, self._dots_json)
+                for message in cached.values()
+            ]
+            if replay:
+                await websocket.send(b'{"batch":[' + b",".join(replay) + b"]}")
+            writer = asyncio.create_task(self._client_writer(websocket, queue))
+
+            async for payload in self._incoming_payloads(websocket):
+                handler = self._command_handlers.get(payload.get("command"))
+                if handler is not None:
+                    await handler(payload)
                 else:
-                    event = payload.get("event")
-                    if event == "viewport":
-                        width = payload.get("width")
-                        height = payload.get("height")
-                        print(f"viewport: {width}x{height}")
-                        if width and height:
-                            set_screen_size(int(width), int(height))
-                        continue
-                    if event == "click":
-                        print(f"clicked: {payload.get('id')}")
-                    if event == "capture_screenshot":
-                        if self.on_capture_screenshot:
-                            result = self.on_capture_screenshot()
-                            if asyncio.iscoroutine(result):
-                                result = await result
-                            self._store_screenshot(result)
-                        continue
-                    if event == "stop_all":
-                        if self.on_stop_all:
-                            result = self.on_stop_all()
-                            if asyncio.iscoroutine(result):
-                                await result
-                        continue
-                    if event == "overlay_input":
-                        text = payload.get("text", "")
-                        request_id = payload.get("requestId") or payload.get("request_id")
-                        now = time.monotonic()
-
-                        # Drop duplicate submit events that can occur during rapid
-                        # key/click interactions or transient websocket reconnects.
-                        if request_id:
-                            expired = [
-                                rid for rid, ts in self._seen_overlay_request_ids.items()
-                                if (now - ts) > 10.0
-                            ]
-                            for rid in expired:
-                                self._seen_overlay_request_ids.pop(rid, None)
-                            if request_id in self._seen_overlay_request_ids:
-                                continue
-                            self._seen_overlay_request_ids[request_id] = now
-                        else:
-                            normalized = " ".join(str(text).split())
-                            if (
-                                normalized
-                                and normalized == self._last_overlay_text
-                                and (now - self._last_overlay_ts) < 1.2
-                            ):
-                                continue
-                            self._last_overlay_text = normalized
-                            self._last_overlay_ts = now
-
-                        if self.on_overlay_input:
-                            result = self.on_overlay_input(text)
-                            if asyncio.iscoroutine(result):
-                                await result
+                    await self._handle_event(payload)
         except ConnectionClosed:
             # Normal path when renderer reloads or disconnects abruptly.
             pass
         finally:
-            self.clients.discard(websocket)
-
-    async def _broadcast(self, payload):
-        if not self.clients:
+            if writer is not None:
+                writer.cancel()
+            self._drop_client(websocket)
+
+    async def _on_draw_box(self, payload: dict) -> None:
+        if payload.get("autoContrast"):
+            center_x = payload.get("x", 0) + (payload.get("width", 0) / 2)
+            center_y = payload.get("y", 0) + (payload.get("height", 0) / 2)
+            theme = await self._theme_for_point(center_x, center_y)
+            payload["stroke"] = theme.get("boxStroke") or theme.get("accent") or payload.get("stroke")
+        self._track_frame(payload)
+        message = self._store_element(self.boxes, self._boxes_json, payload)
+        await self._broadcast(payload, message)
+
+    async def _on_draw_dot(self, payload: dict) -> None:
+        self._track_frame(payload)
+        message = self._store_element(self.dots, self._dots_json, payload)
+        await self._broadcast(payload, message)
+
+    async def _on_draw_text(self, payload: dict) -> None:
+        theme = await self._theme_for_text(payload.get("x", 0), payload.get("y", 0))
+        payload["theme"] = theme
+        payload["color"] = theme.get("accent")
+        self._track_frame(payload)
+        message = self._store_element(self.texts, self._texts_json, payload)
+        await self._broadcast(payload, message)
+
+    async def _on_remove_element(self, store: dict, serialized: dict, payload: dict) -> None:
+        store.pop(payload.get("id"), None)
+        serialized.pop(payload.get("id"), None)
+        self._forget_frame(payload.get("id"))
+        await self._broadcast(payload)
+
+    async def _attach_status_theme(self, payload: dict, reuse_active: bool = True) -> None:
+        if "theme" in payload and payload.get("theme"):
+            self._active_status_theme = payload["theme"]
+        elif reuse_active and self._active_status_theme is not None:
+            payload["theme"] = self._active_status_theme
+        else:
+            self._active_status_theme = await self._theme_for_status()
+            payload["theme"] = self._active_status_theme
+
+    async def _on_show_status_bubble(self, payload: dict) -> None:
+        await self._attach_status_theme(payload, reuse_active=False)
+        await self._broadcast(payload)
+
+    async def _on_update_status_bubble(self, payload: dict) -> None:
+        await self._attach_status_theme(payload)
+        await self._debounce_broadcast(payload)
+
+    async def _on_status_bubble_followup(self, payload: dict) -> None:
+        # update_status_bubble_batch / complete_status_bubble: keep the active theme, never deduped.
+        await self._attach_status_theme(payload)
+        await self._broadcast(payload)
+
+    async def _on_hide_status_bubble(self, payload: dict) -> None:
+        self._active_status_theme = None
+        await self._broadcast(payload)
+
+    async def _on_show_cursor_status(self, payload: dict) -> None:
+        if "theme" not in payload:
+            payload["theme"] = await self._theme_for_cursor()
+        await self._broadcast(payload)
+
+    async def _on_update_cursor_status(self, payload: dict) -> None:
+        if "theme" not in payload:
+            payload["theme"] = await self._theme_for_cursor()
+        await self._debounce_broadcast(payload)
+
+    async def _on_set_cursor_status_position(self, payload: dict) -> None:
+        self._last_cursor_pos = (payload.get("x", 0), payload.get("y", 0))
+        await self._broadcast(payload)
+
+    async def _on_clear(self, payload: dict) -> None:
+        self.boxes.clear()
+        self.texts.clear()
+        self.dots.clear()
+        self._boxes_json.clear()
+        self._texts_json.clear()
+        self._dots_json.clear()
+        self._committed_frames.clear()
+        self._active_status_theme = None
+        self._theme_cache.clear()
+        await self._broadcast(payload)
+
+    async def _handle_event(self, payload: dict) -> None:
+        event = payload.get("event")
+        if event == "viewport":
+            width = payload.get("width")
+            height = payload.get("height")
+            print(f"viewport: {width}x{height}")
+            if width and height:
+                set_screen_size(int(width), int(height))
             return
-        message = json.dumps(payload)
-        stale = []
-        for client in list(self.clients):
-            try:
-                await client.send(message)
-            except ConnectionClosed:
-                stale.append(client)
-
-        for client in stale:
-            self.clients.discard(client)
+        if event == "frame_committed":
+            self._commit_frame(payload.get("id"))
+            return
+        if event == "click":
+            print(f"clicked: {payload.get('id')}")
+        if event == "capture_screenshot":
+            if self.on_capture_screenshot:
+                result = self.on_capture_screenshot()
+                if asyncio.iscoroutine(result):
+                    result = await result
+                self._store_screenshot(result)
+            return
+        if event == "stop_all":
+            if self.on_stop_all:
+                result = self.on_stop_all()
+                if asyncio.iscoroutine(result):
+                    await result
+            return
+        if event == "overlay_input":
+            text = payload.get("text", "")
+            request_id = payload.get("requestId") or payload.get("request_id")
+            now = time.monotonic()
+
+            # Drop duplicate submit events that can occur during rapid
+            # key/click interactions or transient websocket reconnects.
+            if request_id:
+                seen = self._seen_overlay_request_ids
+                # Insertion order is time order, so expiry only ever trims the head.
+                while seen and (now - next(iter(seen.values()))) > 10.0:
+                    seen.popitem(last=False)
+                if request_id in seen:
+                    return
+                seen[request_id] = now
+                if len(seen) > self.SEEN_OVERLAY_REQUEST_IDS_MAX:
+                    seen.popitem(last=False)
+            else:
+                normalized = " ".join(str(text).split())
+                if (
+                    normalized
+                    and normalized == self._last_overlay_text
+                    and (now - self._last_overlay_ts) < 1.2
+                ):
+                    return
+                self._last_overlay_text = normalized
+                self._last_overlay_ts = now
+
+            if self.on_overlay_input:
+                result = self.on_overlay_input(text)
+                if asyncio.iscoroutine(result):
+                    await result
+
+    async def _broadcast(self, payload, message: Optional[bytes] = None):
+        # Held-back status updates predate this payload, so they go out first.
+        self._flush_pending_status()
+        if not self._client_queues:
+            return
+        # Serialize once; each client's writer coalesces bursts into a single frame.
+        if message is None:
+            message = _encode_message(payload)
+        self._queue_broadcast(message)
+
+    def _queue_broadcast(self, message: bytes) -> None:
+        for queue in self._client_queues.values():
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+        self._last_broadcast_message = message
+
+    async def _debounce_broadcast(self, payload: dict) -> None:
+        """Hold `payload` briefly; a newer payload for the same command replaces it."""
+        self._pending_status[payload.get("command")] = payload
+        if self._status_flush_task is None:
+            self._status_flush_task = asyncio.create_task(self._flush_pending_status_later())
+
+    async def _flush_pending_status_later(self) -> None:
+        await asyncio.sleep(self.STATUS_DEBOUNCE_SECONDS)
+        self._status_flush_task = None
+        self._flush_pending_status()
+
+    def _flush_pending_status(self) -> None:
+        if not self._pending_status:
+            return
+        pending, self._pending_status = self._pending_status, {}
+        if not self._client_queues:
+            return
+        for payload in pending.values():
+            message = _encode_message(payload)
+            # Skip updates identical to the message sent just before them.
+            if message != self._last_broadcast_message:
+                self._queue_broadcast(message)
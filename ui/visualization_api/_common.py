@@ -0,0 +1,56 @@
+import asyncio
+import atexit
+import os
+import sys
+from collections import deque
+from functools import lru_cache
+from typing import Optional
+
+# Set VISUALIZATION_API_LOG=0 to silence the [UI_TEXT]/[UI_STATUS]/[UI_CURSOR] traces.
+_LOG_ENABLED = os.getenv("VISUALIZATION_API_LOG", "1").strip().lower() not in ("0", "false", "no", "off")
+
+# Trace lines waiting for the next event-loop tick; the oldest are dropped if a tick never comes.
+_LOG_LINES = deque(maxlen=10_000)
+# Loop with a drain already scheduled, if any.
+_log_drain_loop = None
+
+
+def _drain_log_lines():
+  global _log_drain_loop
+  _log_drain_loop = None
+  if not _LOG_LINES:
+    return
+  lines = list(_LOG_LINES)
+  _LOG_LINES.clear()
+  sys.stdout.write("\n".join(lines) + "\n")
+
+
+def _log_line(line: str):
+  """Queue a trace line; everything logged in one tick is written with a single stdout call."""
+  global _log_drain_loop
+  _LOG_LINES.append(line)
+  try:
+    loop = asyncio.get_running_loop()
+  except RuntimeError:
+    _drain_log_lines()
+    return
+  if _log_drain_loop is loop:
+    return
+  _log_drain_loop = loop
+  loop.call_soon(_drain_log_lines)
+
+
+atexit.register(_drain_log_lines)
+
+
+@lru_cache(maxsize=256)
+def _normalize_str_source(source: str) -> str:
+  stripped = source.strip()
+  return sys.intern(stripped) if stripped else "unknown"
+
+
+def _normalize_source(source: Optional[str]) -> str:
+  # Only real strings go through the cache; None/non-str callers never populate it.
+  if isinstance(source, str) and source:
+    return _normalize_str_source(source)
+  return "unknown"
@@ -15,5 +15,5 @@ async def _clear_screen():
   """
   payload = _build_payload()
   client = await get_client()
-  await client.send(payload)
+  await client.enqueue(payload)
   clear()
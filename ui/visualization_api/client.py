@@ -5,11 +5,34 @@ import websockets
 
 from core.settings import get_host, get_port
 
+# orjson is an optional speedup for encoding payloads; fall back to stdlib.
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+# Shared compact encoder: no whitespace on the wire, and no per-call encoder setup.
+_json_encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+
+def _encode_payload(payload) -> bytes:
+  # Sent as a binary frame; the server's JSON decoder takes bytes directly.
+  if orjson is not None:
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+  return _json_encode(payload).encode("utf-8")
+
 
 class VisualizationClient:
   def __init__(self):
     self._socket = None
     self._lock = asyncio.Lock()
+    self._pending = []
+    # replace_key -> the payload in _pending it last queued
+    self._pending_latest = {}
+    self._flush_task = None
+    self._last_flush_task = None
+    # Failure of a write nobody awaited; raised from the next enqueue().
+    self._unreported_error = None
 
   def _is_closed(self):
     if self._socket is None:
@@ -34,12 +57,71 @@ class VisualizationClient:
     self._socket = await websockets.connect(uri, ping_interval=None)
 
   async def send(self, payload):
+    # Like enqueue, but waits for the frame carrying `payload` and raises if its write failed.
+    await self._await_flush(await self.enqueue(payload))
+
+  async def enqueue(self, payload, replace_key=None):
+    """Queue `payload` without waiting; everything queued in one event-loop tick shares a frame.
+
+    With `replace_key`, a payload still queued under the same key is dropped
+    so only the newest one is sent.
+
+    Returns the task that writes the frame. If an earlier frame failed and nobody
+    awaited it, that failure is raised here instead and `payload` is not queued.
+    """
+    if self._unreported_error is not None:
+      error, self._unreported_error = self._unreported_error, None
+      raise ConnectionError(f"visualization send failed; earlier payloads were dropped: {error!r}") from error
+    if replace_key is not None:
+      stale = self._pending_latest.get(replace_key)
+      if stale is not None:
+        self._pending = [queued for queued in self._pending if queued is not stale]
+      self._pending_latest[replace_key] = payload
+    self._pending.append(payload)
+    if self._flush_task is None:
+      self._flush_task = asyncio.ensure_future(self._flush())
+      self._flush_task.add_done_callback(self._on_flush_done)
+      self._last_flush_task = self._flush_task
+    return self._flush_task
+
+  async def flush(self):
+    """Wait until every payload queued so far has been written."""
+    # Flushes take the lock in creation order, so the newest one finishes last.
+    if self._last_flush_task is not None:
+      await self._await_flush(self._last_flush_task)
+
+  async def _await_flush(self, flush_task):
+    try:
+      await asyncio.shield(flush_task)
+    except Exception as exc:
+      # This caller sees the error, so later enqueue() calls need not raise it again.
+      if self._unreported_error is exc:
+        self._unreported_error = None
+      raise
+
+  def _on_flush_done(self, task):
+    # Runs before any awaiting send()/flush() resumes, which then claims the error.
+    if task.cancelled() or task.exception() is None:
+      return
+    self._unreported_error = task.exception()
+    print(f"[VisualizationClient] send failed: {task.exception()!r}")
+
+  async def _flush(self):
+    self._flush_task = None
+    payloads, self._pending = self._pending, []
+    self._pending_latest = {}
+    if len(payloads) == 1:
+      message = _encode_payload(payloads[0])
+    else:
+      message = _encode_payload({"batch": payloads})
     async with self._lock:
       if self._is_closed():
         await self._connect()
-      await self._socket.send(json.dumps(payload))
+      await self._socket.send(message)
 
   async def close(self):
+    if self._last_flush_task is not None:
+      await asyncio.gather(self._last_flush_task, return_exceptions=True)
     async with self._lock:
       if self._socket and not self._is_closed():
         await self._socket.close()
@@ -1,21 +1,31 @@
-import uuid
+import itertools
+import os
 from typing import Optional
 
+from ui.visualization_api._common import _LOG_ENABLED, _log_line, _normalize_source
 from ui.visualization_api.client import get_client
-from ui.visualization_api.draw_bounding_box import get_box_rect
+from ui.visualization_api.draw_bounding_box import get_box_xywh
 from core.registry import register_text
 
 
-def _normalize_source(source: Optional[str]) -> str:
-  if isinstance(source, str) and source.strip():
-    return source.strip()
-  return "unknown"
+_ID_SEQ = itertools.count(os.getpid() << 32)
 
 
 def _log_text(channel: str, text_id: str, text: str, source: Optional[str] = None):
+  if not _LOG_ENABLED:
+    return
   safe_text = "" if text is None else str(text)
   src = _normalize_source(source)
-  print(f"[UI_TEXT][{src}][{channel}][{text_id}] {safe_text}")
+  _log_line(f"[UI_TEXT][{src}][{channel}][{text_id}] {safe_text}")
+
+
+# position -> (x, y, width, height, padding) -> (anchor_x, anchor_y, baseline, default_align)
+_POSITION_ANCHORS = {
+  "top": lambda x, y, w, h, p: (x + (w / 2), y - p, "bottom", "center"),
+  "bottom": lambda x, y, w, h, p: (x + (w / 2), y + h + p, "top", "center"),
+  "left": lambda x, y, w, h, p: (x - p, y + (h / 2), "middle", "right"),
+  "right": lambda x, y, w, h, p: (x + w + p, y + (h / 2), "middle", "left"),
+}
 
 
 def _build_payload(x, y, text, text_id, font_size, font_family, align, baseline, source):
@@ -59,7 +69,7 @@ async def _create_text(
     align (str, optional): Canvas textAlign value
     baseline (str, optional): Canvas textBaseline value
   """
-  text_id = text_id or f"text_{uuid.uuid4().hex[:8]}"
+  text_id = text_id or f"text_{next(_ID_SEQ):x}"
   _log_text("draw_text", text_id, text, source)
   payload = _build_payload(
     x,
@@ -73,11 +83,16 @@ async def _create_text(
     source,
   )
   client = await get_client()
-  await client.send(payload)
+  await client.enqueue(payload)
   register_text(text_id, payload["x"], payload["y"])
   return text_id
 
 
+async def _create_texts(texts: list) -> list:
+  """Batch form of _create_text: one kwargs dict per item, sent together. Returns the ids in order."""
+  return [await _create_text(**item) for item in texts]
+
+
 async def _create_text_for_box(
   box: dict,
   text: str,
@@ -102,36 +117,35 @@ async def _create_text_for_box(
     align (str, optional): Canvas textAlign value for the anchor
     padding (int, optional): Pixels between text and box
   """
-  x = box["x"]
-  y = box["y"]
-  width = box["width"]
-  height = box["height"]
-
-  center_x = x + (width / 2)
-  center_y = y + (height / 2)
-
-  if position == "top":
-    anchor_x = center_x
-    anchor_y = y - padding
-    baseline = "bottom"
-    default_align = "center"
-  elif position == "bottom":
-    anchor_x = center_x
-    anchor_y = y + height + padding
-    baseline = "top"
-    default_align = "center"
-  elif position == "left":
-    anchor_x = x - padding
-    anchor_y = center_y
-    baseline = "middle"
-    default_align = "right"
-  elif position == "right":
-    anchor_x = x + width + padding
-    anchor_y = center_y
-    baseline = "middle"
-    default_align = "left"
-  else:
+  return await _create_text_for_rect(
+    (box["x"], box["y"], box["width"], box["height"]),
+    text,
+    position,
+    text_id,
+    font_size,
+    font_family,
+    align,
+    padding,
+    source,
+  )
+
+
+async def _create_text_for_rect(
+  rect: tuple,
+  text: str,
+  position: str,
+  text_id: str,
+  font_size: int,
+  font_family: str,
+  align: str,
+  padding: int,
+  source: Optional[str] = None,
+):
+  """Shared body of the box/box-id variants; `rect` is (x, y, width, height)."""
+  anchor = _POSITION_ANCHORS.get(position)
+  if anchor is None:
     raise ValueError("position must be one of: top, bottom, left, right")
+  anchor_x, anchor_y, baseline, default_align = anchor(*rect, padding)
 
   anchor_align = align or default_align
   return await _create_text(
@@ -171,17 +185,17 @@ async def _create_text_for_box_id(
     align (str, optional): Canvas textAlign value for the anchor
     padding (int, optional): Pixels between text and box
   """
-  box = get_box_rect(box_id)
-  if not box:
+  rect = get_box_xywh(box_id)
+  if rect is None:
     raise ValueError(f"box_id not found in cache: {box_id}")
-  return await _create_text_for_box(
-    box,
+  return await _create_text_for_rect(
+    rect,
     text,
-    position=position,
-    text_id=text_id,
-    font_size=font_size,
-    font_family=font_family,
-    align=align,
-    padding=padding,
-    source=source,
+    position,
+    text_id,
+    font_size,
+    font_family,
+    align,
+    padding,
+    source,
   )
@@ -7,21 +7,16 @@ Used to display short "thinking" updates during vision actions.
 
 from typing import Optional
 
+from ui.visualization_api._common import _LOG_ENABLED, _log_line, _normalize_source
 from ui.visualization_api.client import get_client
 
 
-def _normalize_source(source: Optional[str]) -> str:
-    if isinstance(source, str) and source.strip():
-        return source.strip()
-    return "unknown"
-
-
 def _log_cursor(channel: str, text: str, source: Optional[str] = None):
-    if channel == "update":
+    if not _LOG_ENABLED:
         return
     safe_text = "" if text is None else str(text)
     src = _normalize_source(source)
-    print(f"[UI_CURSOR][{src}][{channel}] {safe_text}")
+    _log_line(f"[UI_CURSOR][{src}][{channel}] {safe_text}")
 
 
 async def show_cursor_status(
@@ -38,7 +33,7 @@ async def show_cursor_status(
     if theme:
         payload["theme"] = theme
     client = await get_client()
-    await client.send(payload)
+    await client.enqueue(payload)
 
 
 async def update_cursor_status(
@@ -51,11 +46,10 @@ async def update_cursor_status(
         "text": text,
         "source": _normalize_source(source),
     }
-    _log_cursor("update", text, source)
     if theme:
         payload["theme"] = theme
     client = await get_client()
-    await client.send(payload)
+    await client.enqueue(payload, replace_key="update_cursor_status")
 
 
 async def hide_cursor_status():
@@ -63,7 +57,7 @@ async def hide_cursor_status():
         "command": "hide_cursor_status",
     }
     client = await get_client()
-    await client.send(payload)
+    await client.enqueue(payload)
 
 
 async def set_cursor_status_position(x: int, y: int):
@@ -73,4 +67,4 @@ async def set_cursor_status_position(x: int, y: int):
         "y": y,
     }
     client = await get_client()
-    await client.send(payload)
+    await client.enqueue(payload, replace_key="set_cursor_status_position")
@@ -5,11 +5,13 @@ from core.registry import remove_entry
 
 async def _destroy_box(box_id: str):
   forget_box_rect(box_id)
+  # Never drawn, already destroyed, or wiped by clear: nothing on screen to remove.
+  if not remove_entry(box_id):
+    return
   payload = {
     "command": "remove_box",
     "id": box_id
   }
 
   client = await get_client()
-  await client.send(payload)
-  remove_entry(box_id)
+  await client.enqueue(payload)
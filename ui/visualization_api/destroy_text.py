@@ -13,7 +13,8 @@ async def _destroy_text(text_id: str):
   Args:
     text_id (str): ID returned by create_text
   """
+  if not remove_entry(text_id):
+    return
   payload = _build_payload(text_id)
   client = await get_client()
-  await client.send(payload)
-  remove_entry(text_id)
+  await client.enqueue(payload)
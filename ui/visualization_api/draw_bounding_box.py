@@ -1,11 +1,19 @@
-import uuid
+import itertools
+import os
 from typing import Optional
 
+import numpy as np
+
 from ui.visualization_api.client import get_client
 from core.registry import register_box
 
+# box_id -> (x, y, width, height)
 _BOX_CACHE = {}
 
+# Default ids only need to be unique on screen; the pid prefix keeps them clear of
+# elements left behind by an earlier process.
+_ID_SEQ = itertools.count(os.getpid() << 32)
+
 def _build_payload(x, y, width, height, box_id, stroke, stroke_width, opacity, auto_contrast, fill):
   payload = {
     "command": "draw_box",
@@ -27,16 +35,8 @@ def _build_payload(x, y, width, height, box_id, stroke, stroke_width, opacity, a
   return payload
 
 
-def get_box_rect(box_id: str):
-  box = _BOX_CACHE.get(box_id)
-  if not box:
-    return None
-  return {
-    "x": box["x"],
-    "y": box["y"],
-    "width": box["width"],
-    "height": box["height"],
-  }
+def get_box_xywh(box_id: str):
+  return _BOX_CACHE.get(box_id)
 
 
 def forget_box_rect(box_id: str):
@@ -77,17 +77,68 @@ async def _draw_bounding_box(
   width = x_max - x_min
   height = y_max - y_min
   
-  box_id = box_id or f"box_{uuid.uuid4().hex[:8]}"
+  box_id = box_id or f"box_{next(_ID_SEQ):x}"
   
   payload = _build_payload(x_min, y_min, width, height, box_id, stroke, stroke_width, opacity, auto_contrast, fill)
-  _BOX_CACHE[box_id] = {
-    "x": payload["x"],
-    "y": payload["y"],
-    "width": payload["width"],
-    "height": payload["height"],
-  }
+  _BOX_CACHE[box_id] = (payload["x"], payload["y"], payload["width"], payload["height"])
   client = await get_client()
-  await client.send(payload)
+  await client.enqueue(payload)
   register_box(box_id, payload["x"], payload["y"], payload["x"] + payload["width"], payload["y"] + payload["height"])
 
   return box_id
+
+
+async def _draw_bounding_boxes(boxes: list) -> list:
+  """
+  Draw several boxes at once; each item holds the keyword arguments of _draw_bounding_box.
+
+  Nothing yields between items, so the whole list leaves the client as one frame.
+
+  Returns:
+    list[str]: The box_ids used, in input order.
+  """
+  return [await _draw_bounding_box(**item) for item in boxes]
+
+
+async def _draw_bounding_boxes_np(
+  coords,
+  stroke: str,
+  stroke_width: int,
+  opacity: float,
+  box_ids: Optional[list] = None,
+  auto_contrast: bool = False,
+  fill: Optional[str] = None,
+) -> list:
+  """
+  Draw many boxes from an (N, 4) array of Gemini-order coordinates [y_min, x_min, y_max, x_max].
+
+  Sizes and integer conversion are done in one NumPy pass instead of per box; all
+  boxes share the same style and leave the client as one frame.
+
+  Returns:
+    list[str]: The box_ids used, in row order.
+  """
+  coords = np.asarray(coords).reshape(-1, 4)
+  if box_ids is not None and len(box_ids) != len(coords):
+    raise ValueError(f"box_ids has {len(box_ids)} entries for {len(coords)} boxes")
+  # Integer input goes signed first so inverted boxes get negative spans instead of wrapping.
+  if coords.dtype.kind in "iub":
+    coords = coords.astype(np.int64, copy=False)
+  # Spans come from the raw values, like _draw_bounding_box, before truncating.
+  rects = np.empty_like(coords)
+  rects[:, 0] = coords[:, 1]
+  rects[:, 1] = coords[:, 0]
+  rects[:, 2] = coords[:, 3] - coords[:, 1]
+  rects[:, 3] = coords[:, 2] - coords[:, 0]
+  rects = rects.astype(np.int64, copy=False).tolist()
+
+  client = await get_client()
+  used_ids = []
+  for index, (x, y, width, height) in enumerate(rects):
+    box_id = (box_ids[index] if box_ids else None) or f"box_{next(_ID_SEQ):x}"
+    payload = _build_payload(x, y, width, height, box_id, stroke, stroke_width, opacity, auto_contrast, fill)
+    _BOX_CACHE[box_id] = (x, y, width, height)
+    await client.enqueue(payload)
+    register_box(box_id, x, y, x + width, y + height)
+    used_ids.append(box_id)
+  return used_ids
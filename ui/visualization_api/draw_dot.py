@@ -1,8 +1,12 @@
-import uuid
+import itertools
+import os
 
 from ui.visualization_api.client import get_client
 
 
+_ID_SEQ = itertools.count(os.getpid() << 32)
+
+
 async def _draw_dot(
   x: int,
   y: int,
@@ -26,16 +30,16 @@ async def _draw_dot(
     ring_color (str): Ring color
     line_target_text_id (str, optional): Text id to draw line to
   """
-  dot_id = dot_id or f"dot_{uuid.uuid4().hex[:8]}"
+  dot_id = dot_id or f"dot_{next(_ID_SEQ):x}"
   payload = {
     "command": "draw_dot",
     "id": dot_id,
     "x": int(x),
     "y": int(y),
     "radius": int(radius),
-    "color": dot_color,
     "dotColor": dot_color,
-    "ringColor": ring_color,
+    # The renderer used to fall back to "color" (the dot color) for a missing ring color.
+    "ringColor": ring_color or dot_color,
   }
   if ring_radius is not None:
     payload["ringRadius"] = int(ring_radius)
@@ -45,5 +49,10 @@ async def _draw_dot(
     payload["lineColor"] = "#ffffff"
     payload["lineWidth"] = 2
   client = await get_client()
-  await client.send(payload)
+  await client.enqueue(payload)
   return dot_id
+
+
+async def _draw_dots(dots: list) -> list:
+  """Batch form of _draw_dot: one kwargs dict per item, sent together. Returns the ids in order."""
+  return [await _draw_dot(**item) for item in dots]
@@ -5,23 +5,18 @@ Shows/hides the status bubble at the top of the screen.
 Used to display agent activity like "Opening file...", "Searching online..."
 """
 
-from typing import Optional
+from typing import List, Optional
 
+from ui.visualization_api._common import _LOG_ENABLED, _log_line, _normalize_source
 from ui.visualization_api.client import get_client
 
 
-def _normalize_source(source: Optional[str]) -> str:
-    if isinstance(source, str) and source.strip():
-        return source.strip()
-    return "unknown"
-
-
 def _log_status(channel: str, text: str, source: Optional[str] = None):
-    if channel == "update":
+    if not _LOG_ENABLED:
         return
     safe_text = "" if text is None else str(text)
     src = _normalize_source(source)
-    print(f"[UI_STATUS][{src}][{channel}] {safe_text}")
+    _log_line(f"[UI_STATUS][{src}][{channel}] {safe_text}")
 
 
 async def show_status_bubble(
@@ -44,7 +39,7 @@ async def show_status_bubble(
     if theme:
         payload["theme"] = theme
     client = await get_client()
-    await client.send(payload)
+    await client.enqueue(payload)
 
 
 async def update_status_bubble(
@@ -62,12 +57,39 @@ async def update_status_bubble(
         "command": "update_status_bubble",
         "text": text,
     }
-    _log_status("update", text, source)
     payload["source"] = _normalize_source(source)
     if theme:
         payload["theme"] = theme
     client = await get_client()
-    await client.send(payload)
+    await client.enqueue(payload, replace_key="update_status_bubble")
+
+
+async def update_status_bubble_batch(
+    messages: List[str],
+    interval_ms: int = 1000,
+    theme: Optional[dict] = None,
+    source: Optional[str] = None,
+):
+    """
+    Queue a sequence of status updates in a single message.
+
+    The renderer plays them back in order, waiting at least interval_ms
+    between updates and never interrupting a text transition.
+
+    Args:
+        messages (list[str]): Status texts to display, in order
+        interval_ms (int): Minimum delay between updates in milliseconds (default: 1000)
+    """
+    payload = {
+        "command": "update_status_bubble_batch",
+        "messages": [str(message) for message in messages],
+        "intervalMs": max(0, int(interval_ms)),
+    }
+    payload["source"] = _normalize_source(source)
+    if theme:
+        payload["theme"] = theme
+    client = await get_client()
+    await client.enqueue(payload)
 
 
 async def hide_status_bubble(delay: int = 0):
@@ -82,7 +104,7 @@ async def hide_status_bubble(delay: int = 0):
         "delay": delay,
     }
     client = await get_client()
-    await client.send(payload)
+    await client.enqueue(payload)
 
 
 async def complete_status_bubble(
@@ -112,10 +134,10 @@ async def complete_status_bubble(
     if theme:
         payload["theme"] = theme
     client = await get_client()
-    await client.send(payload)
+    await client.enqueue(payload)
 
 
 async def show_command_overlay():
     """Show the centered command overlay (test/debug helper)."""
     client = await get_client()
-    await client.send({"command": "show_command_overlay"})
+    await client.enqueue({"command": "show_command_overlay"})